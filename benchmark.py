@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for the trie hot paths. For each dictionary size it
+writes a synthetic word list (or uses a given dictionary file), builds
+each backend from it (in memory, one compiled file, or one compiled file
+per first letter), and times getFromFile(), insert(), search() for words
+that exist and words that do not, words(), sbWords() for fixed puzzles,
+and isNewSBWord() for a fixed mix of guesses. Peak memory of
+the build is measured separately with tracemalloc (which slows timing).
+Everything is generated from a fixed seed, so runs are reproducible.
+Results are printed as a table and can be saved as JSON and compared
+against a saved baseline, failing if anything got slower than allowed.
+New backends plug in by adding an entry to BACKENDS.
+Run as: python benchmark.py [--sizes 10000,100000] [--output FILE] [--baseline FILE] ...
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from dictfile import compileDictionary
+from sbtrie import SBTrie, SBSession
+from shards import compileShards
+from trie import Node, CompactNode
+
+# Letters weighted roughly by English frequency for synthetic words
+LETTER_WEIGHTS = "eeeeeeeeaaaaaarrrrriiiiiooooottttnnnnsssllllcccuuuddpppmmhhggbbffyywkvxzjq"
+
+PUZZLES = 20 # Puzzles timed with sbWords() and isNewSBWord()
+GUESSES = 200 # Guesses per puzzle timed with isNewSBWord()
+SAMPLE = 10000 # Words timed with search() and insert()
+
+
+
+# Purpose: Load a dictionary for the dict-of-nodes backend.
+# Params: Name of plain word list file, name of compiled file.
+# Returns: Loaded SBTrie.
+def loadDict(textFile: str, compiledFile: str) -> SBTrie:
+    trie = SBTrie(Node)
+    trie.getFromFile(textFile)
+    return trie
+
+
+
+# Purpose: Load a dictionary for the compact node backend.
+# Params: Name of plain word list file, name of compiled file.
+# Returns: Loaded SBTrie.
+def loadCompact(textFile: str, compiledFile: str) -> SBTrie:
+    trie = SBTrie(CompactNode)
+    trie.getFromFile(textFile)
+    return trie
+
+
+
+# Purpose: Load a dictionary for the memory-mapped compiled file backend.
+# Params: Name of plain word list file, name of compiled file.
+# Returns: Loaded SBTrie.
+def loadCompiled(textFile: str, compiledFile: str) -> SBTrie:
+    trie = SBTrie()
+    trie.getFromFile(compiledFile)
+    return trie
+
+
+
+# Purpose: Load a dictionary for the sharded compiled files backend.
+# Params: Name of plain word list file, name of compiled file (shards are in directory of same name ending in .shards).
+# Returns: Loaded SBTrie.
+def loadShards(textFile: str, compiledFile: str) -> SBTrie:
+    trie = SBTrie()
+    trie.getFromFile(shardsDirectory(compiledFile))
+    return trie
+
+
+
+# Purpose: Name the sharded dictionary directory built alongside a compiled file.
+# Params: Name of compiled file.
+# Returns: Name of directory holding shards.
+def shardsDirectory(compiledFile: str) -> str:
+    return os.path.splitext(compiledFile)[0] + ".shards"
+
+
+
+# Backend name keys and functions that load a dictionary for that backend
+BACKENDS = {
+    "dict": loadDict,
+    "compact": loadCompact,
+    "compiled": loadCompiled,
+    "shards": loadShards,
+}
+
+
+
+# Purpose: Generate reproducible synthetic lowercase words.
+# Params: Number of words, seed for random generator.
+# Returns: Sorted list of unique words between four and twelve letters long.
+def syntheticWords(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        length = rng.randint(4, 12)
+        words.add("".join(rng.choice(LETTER_WEIGHTS) for _ in range(length)))
+    return sorted(words)
+
+
+
+# Purpose: Pick reproducible puzzles from a dictionary's seven-letter words.
+# Params: Sorted list of dictionary words, seed for random generator.
+# Returns: List of (central letter, other six letters) tuples.
+def choosePuzzles(words: list[str], seed: int) -> list[tuple]:
+    rng = random.Random(seed)
+    candidates = sorted({"".join(sorted(set(word))) for word in words if len(set(word)) == 7})
+    if not candidates:
+        candidates = ["aeilnrt"] # No pangrams in dictionary, time an arbitrary letter set
+    puzzles = []
+    for _ in range(PUZZLES):
+        letters = rng.choice(candidates)
+        central = rng.choice(letters)
+        puzzles.append((central, letters.replace(central, "")))
+    return puzzles
+
+
+
+# Purpose: Time a function, keeping the fastest of several runs.
+# Params: Function to time, number of runs.
+# Returns: Fastest run in seconds.
+def bestTime(function, repeat: int = 3) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+
+# Purpose: Run every benchmark for one backend and dictionary.
+# Params: Function loading backend, plain word list file, compiled file, sorted words in file, seed, if memory is measured.
+# Returns: Dictionary of metric names and values (lower is better for all of them).
+def runBackend(load, textFile: str, compiledFile: str, words: list[str], seed: int, memory: bool) -> dict:
+    rng = random.Random(seed)
+    results = {}
+
+    start = time.perf_counter()
+    trie = load(textFile, compiledFile)
+    results["getFromFile_s"] = time.perf_counter() - start
+
+    hits = rng.sample(words, min(SAMPLE, len(words)))
+    misses = [word + "q" for word in hits] # Words outside the dictionary sharing its prefixes
+    results["search_hit_ns"] = bestTime(lambda: [trie.search(word) for word in hits]) / len(hits) * 1e9
+    results["search_miss_ns"] = bestTime(lambda: [trie.search(word) for word in misses]) / len(misses) * 1e9
+    results["words_s"] = bestTime(trie.words, 1)
+
+    puzzles = choosePuzzles(words, seed)
+    results["sbWords_ms"] = bestTime(lambda: [trie.sbWords(central, others) for central, others in puzzles]) / len(puzzles) * 1e3
+
+    # Guesses are a fixed mix of answers and made-up words for each puzzle
+    guessTime = 0
+    for central, others in puzzles:
+        session = SBSession(trie)
+        session.setLetters(central, others)
+        answers = session.currentAnswers().answers
+        letters = central + others
+        guesses = [rng.choice(answers) if answers and rng.random() < 0.5
+                   else "".join(rng.choice(letters) for _ in range(rng.randint(3, 9))) for _ in range(GUESSES)]
+        guessTime += bestTime(lambda: [session.isNewSBWord(word) for word in guesses])
+    results["isNewSBWord_ns"] = guessTime / (len(puzzles) * GUESSES) * 1e9
+
+    newWords = [word + "zz" for word in hits] # Not in dictionary yet, so every insert adds a word
+    start = time.perf_counter()
+    for word in newWords:
+        trie.insert(word)
+    results["insert_us"] = (time.perf_counter() - start) / len(newWords) * 1e6
+
+    if memory:
+        del trie
+        tracemalloc.start()
+        trie = load(textFile, compiledFile)
+        results["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return results
+
+
+
+# Purpose: Compare results against a baseline.
+# Params: Results dictionary, baseline results dictionary, allowed slowdown as a fraction (0.2 is 20%).
+# Returns: List of messages for metrics that got worse than allowed.
+def compareResults(results: dict, baseline: dict, threshold: float) -> list[str]:
+    regressions = []
+    for backend, sizes in results["results"].items():
+        for size, metrics in sizes.items():
+            baseMetrics = baseline.get("results", {}).get(backend, {}).get(size, {})
+            for metric, value in metrics.items():
+                baseValue = baseMetrics.get(metric)
+                if baseValue and value > baseValue * (1 + threshold):
+                    regressions.append(f"{backend} {size} {metric}: {baseValue:.4g} -> {value:.4g} "
+                                       f"(+{(value / baseValue - 1) * 100:.0f}%)")
+    return regressions
+
+
+
+# Purpose: Main function for benchmark suite.
+# Params: None, reads command line arguments.
+# Returns: None (prints results, exits with status 1 if baseline comparison finds regressions).
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Trie and SBTrie operations")
+    parser.add_argument("--sizes", default="10000,100000", help="comma separated synthetic dictionary sizes")
+    parser.add_argument("--dictionary", help="benchmark a word list file instead of synthetic words")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma separated backends to run")
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--no-memory", action="store_true", help="skip peak memory measurement")
+    parser.add_argument("--output", help="save results as JSON")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before failing (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    results = {"meta": {"python": platform.python_version(), "platform": platform.platform(), "seed": args.seed},
+               "results": {}}
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        datasets = []
+        if args.dictionary:
+            trie = SBTrie()
+            trie.getFromFile(args.dictionary)
+            datasets.append((os.path.basename(args.dictionary), trie.words()))
+        else:
+            for size in args.sizes.split(","):
+                datasets.append((size, syntheticWords(int(size), args.seed)))
+
+        for label, words in datasets:
+            textFile = os.path.join(tempDir, f"{label}.txt")
+            compiledFile = os.path.join(tempDir, f"{label}.sbd")
+            with open(textFile, "w") as wordFile:
+                wordFile.write("\n".join(words))
+            source = SBTrie()
+            source.getFromFile(textFile)
+            compileDictionary(source, compiledFile)
+            compileShards(source, shardsDirectory(compiledFile))
+            del source
+
+            for backend in args.backends.split(","):
+                metrics = runBackend(BACKENDS[backend], textFile, compiledFile, words, args.seed, not args.no_memory)
+                results["results"].setdefault(backend, {})[label] = metrics
+                print(f"{backend:<9}{label:>9}  " + "  ".join(f"{metric} {value:.4g}" for metric, value in metrics.items()))
+
+    if args.output:
+        with open(args.output, "w") as outFile:
+            json.dump(results, outFile, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseFile:
+            regressions = compareResults(results, json.load(baseFile), args.threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print("no regressions against baseline")
+
+
+
+if __name__ == "__main__":
+    main()
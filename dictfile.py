@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled dictionary files. A loaded trie can be written out once to a
+versioned binary file, which is then memory-mapped on later runs instead
+of being parsed and inserted word by word. Lookups (search, Spelling Bee
+words) are answered straight from the mapped file, so loading is near
+instant and processes using the same file share its pages.
+
+File layout (little-endian):
+- Header: magic, format version, word count, letter mask count, size of word data
+- Word offsets: word count + 1 unsigned 32-bit offsets into word data
+- Word data: all words in sorted order, UTF-8 encoded back to back
+- Masks: sorted unsigned 32-bit letter masks (bit 0 'a' to bit 25 'z', bit 31 any other letter)
+- Mask starts: mask count + 1 positions into mask words, where each mask's group of words begins
+- Mask words: indexes of words (at least four letters) grouped by mask, sorted within each group
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+MAGIC = b"SBDICT\x00\x00" # Identifies compiled dictionary files
+VERSION = 1 # Incremented whenever file layout changes
+HEADER = struct.Struct("<8sIIII") # Magic, version, word count, mask count, word data size
+OTHER_LETTER = 1 << 31 # Mask bit shared by all letters outside a-z
+
+
+
+# Purpose: Build 32-bit letter mask used in compiled files.
+# Params: Word (or string of letters) to build mask from.
+# Returns: Bitmask with bit 0 for 'a' through bit 25 for 'z', and bit 31 if any other letter is used.
+def fileMask(word: str) -> int:
+    mask = 0
+    for ch in word:
+        if "a" <= ch <= "z":
+            mask |= 1 << (ord(ch) - 97)
+        else:
+            mask |= OTHER_LETTER
+    return mask
+
+
+
+# Purpose: Check if a file is a compiled dictionary.
+# Params: Name of file to check.
+# Returns: True if file starts with compiled dictionary magic bytes, false if not (or unreadable).
+def isCompiled(filename: str) -> bool:
+    try:
+        with open(filename, "rb") as dictFile:
+            return dictFile.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+
+# Purpose: Write all words in a trie to a compiled dictionary file.
+# Params: Trie to compile (anything with words()), name of file to write.
+# Returns: Number of words written.
+def compileDictionary(trie, filename: str) -> int:
+    return compileWords(trie.words(), filename) # Sorted, so file can be binary searched
+
+
+
+# Purpose: Write a sorted list of words to a compiled dictionary file.
+# Params: Sorted list of distinct lowercase words, name of file to write.
+# Returns: Number of words written.
+def compileWords(words: list[str], filename: str) -> int:
+    if sys.byteorder != "little":
+        raise ValueError("compiled dictionaries are little-endian only")
+
+    offsets = array("I", [0])
+    data = bytearray()
+    groups = {} # Mask keys and lists of word indexes
+    for ind, word in enumerate(words):
+        data += word.encode("utf-8")
+        offsets.append(len(data))
+        if len(word) >= 4:
+            groups.setdefault(fileMask(word), []).append(ind)
+
+    masks = array("I", sorted(groups))
+    starts = array("I", [0])
+    maskWords = array("I")
+    for mask in masks:
+        maskWords.extend(groups[mask])
+        starts.append(len(maskWords))
+
+    with open(filename, "wb") as dictFile:
+        dictFile.write(HEADER.pack(MAGIC, VERSION, len(words), len(masks), len(data)))
+        dictFile.write(offsets.tobytes())
+        dictFile.write(data)
+        dictFile.write(b"\x00" * (-len(data) % 4)) # Pad so following arrays stay 4-byte aligned
+        dictFile.write(masks.tobytes())
+        dictFile.write(starts.tobytes())
+        dictFile.write(maskWords.tobytes())
+    return len(words)
+
+
+
+class MappedDictionary:
+    """ A class for a read-only dictionary answered from a memory-mapped compiled file """
+    def __init__(self, filename: str):
+        if sys.byteorder != "little":
+            raise ValueError("compiled dictionaries are little-endian only")
+
+        with open(filename, "rb") as dictFile:
+            self.buffer = mmap.mmap(dictFile.fileno(), 0, access=mmap.ACCESS_READ) # Pages shared between processes mapping same file
+
+        if len(self.buffer) < HEADER.size:
+            raise ValueError(f"{filename} is not a compiled dictionary")
+        magic, version, self.count, maskCount, dataSize = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a compiled dictionary")
+        if version != VERSION:
+            raise ValueError(f"{filename} has unsupported format version {version}")
+
+        view = memoryview(self.buffer)
+        pos = HEADER.size
+        self.offsets = view[pos:pos + 4 * (self.count + 1)].cast("I")
+        pos += 4 * (self.count + 1)
+        self.dataStart = pos # Word data is sliced from mapped buffer directly (slices are bytes)
+        pos += dataSize + (-dataSize % 4)
+        self.masks = view[pos:pos + 4 * maskCount].cast("I")
+        pos += 4 * maskCount
+        self.starts = view[pos:pos + 4 * (maskCount + 1)].cast("I")
+        pos += 4 * (maskCount + 1)
+        self.maskWords = view[pos:pos + 4 * self.starts[maskCount]].cast("I")
+
+
+
+    # Purpose: Retrieve word stored at an index.
+    # Params: Index of word in sorted word list.
+    # Returns: Word as string.
+    def word(self, ind: int) -> str:
+        return self.wordBytes(ind).decode("utf-8")
+
+
+
+    # Purpose: Retrieve encoded word stored at an index.
+    # Params: Index of word in sorted word list.
+    # Returns: Word as UTF-8 bytes.
+    def wordBytes(self, ind: int) -> bytes:
+        return self.buffer[self.dataStart + self.offsets[ind]:self.dataStart + self.offsets[ind + 1]]
+
+
+
+    # Purpose: Search for word from parameter.
+    # Params: String for word being searched.
+    # Returns: True if word from parameter exists in dictionary.
+    def search(self, word: str) -> bool:
+        target = word.lower().encode("utf-8")
+        low = self._lowerBound(target)
+        return low < self.count and self.wordBytes(low) == target
+
+
+
+    # Purpose: Find index of first word not less than target.
+    # Params: Encoded target word, optional range of indexes to search (whole dictionary by default).
+    # Returns: Index of first word >= target (end of range if none).
+    def _lowerBound(self, target: bytes, low: int = 0, high: int = None) -> int:
+        if high is None:
+            high = self.count
+
+        # Binary search over sorted words (UTF-8 byte order matches string order)
+        while low < high:
+            mid = (low + high) // 2
+            if self.wordBytes(mid) < target:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+
+
+    # Purpose: Find range of words starting with a prefix, like the subtree of a prefix's node in a trie.
+    # Params: Prefix, optional range of indexes known to hold every word with prefix (whole dictionary by default).
+    # Returns: Tuple of index of first word with prefix and index after last one (same index if there are none).
+    def prefixRange(self, prefix: str, low: int = 0, high: int = None) -> tuple:
+        target = prefix.encode("utf-8")
+        start = self._lowerBound(target, low, high)
+        return start, self._lowerBound(target + b"\xff", start, high) # No UTF-8 byte is 0xff, so every word with prefix sorts first
+
+
+
+    # Purpose: Build a list of all words in dictionary that meet criteria of Spelling Bee game.
+    # Params: String for central letter, string for other six letters.
+    # Returns: Sorted list of words at least four letters long, containing central letter, and
+    # no letters outside of the seven valid letters.
+    def sbWords(self, centralLetter: str, otherLetters: str) -> list[str]:
+        if not centralLetter:
+            return []
+
+        centralBit = fileMask(centralLetter)
+        otherMask = fileMask(otherLetters) & ~centralBit
+        letters = set(centralLetter + otherLetters)
+        foundWords = []
+
+        # Look up words for every subset of other letters combined with central letter
+        subset = otherMask
+        while True:
+            mask = subset | centralBit
+            ind = bisect_left(self.masks, mask)
+            if ind < len(self.masks) and self.masks[ind] == mask:
+                for wordInd in self.maskWords[self.starts[ind]:self.starts[ind + 1]]:
+                    word = self.word(wordInd)
+                    # Letters outside a-z share one bit, so those words are checked letter by letter
+                    if not mask & OTHER_LETTER or (set(word) <= letters and centralLetter in word):
+                        foundWords.append(word)
+            if subset == 0:
+                break
+            subset = (subset - 1) & otherMask
+
+        return sorted(foundWords)
+
+
+
+    # Purpose: Return number of words stored in dictionary.
+    # Params: None.
+    # Returns: Number of words in dictionary.
+    def wordCount(self) -> int:
+        return self.count
+
+
+
+    # Purpose: Builds and returns a list of all words in dictionary.
+    # Params: None.
+    # Returns: Sorted list of all words.
+    def words(self) -> list[str]:
+        return [self.word(ind) for ind in range(self.count)]
+
+
+
+    # Purpose: Lazily yield words in dictionary in sorted order.
+    # Params: Optional prefix, only words starting with it are yielded.
+    # Returns: Generator of words in sorted order.
+    def iterWords(self, prefix: str = ""):
+        target = prefix.lower().encode("utf-8")
+        for ind in range(self._lowerBound(target), self.count):
+            wordBytes = self.wordBytes(ind)
+            if not wordBytes.startswith(target):
+                return # Words with prefix are contiguous, so first word without it ends them
+            yield wordBytes.decode("utf-8")
+
+
+
+# Purpose: Compile a plain word list into a compiled dictionary file.
+# Params: None, reads command line arguments (word list file, output file).
+# Returns: None (writes compiled file and prints word count).
+def main():
+    from trie import Trie
+
+    if len(sys.argv) != 3:
+        print("usage: python dictfile.py <wordfile> <compiledfile>")
+        return
+
+    trie = Trie()
+    if not trie.getFromFile(sys.argv[1]):
+        print(f"could not read {sys.argv[1]}")
+        return
+    print(f"{compileDictionary(trie, sys.argv[2])} words compiled")
+
+
+
+if __name__ == "__main__":
+    main()
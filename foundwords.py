@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+Compact record of the words one player has found. Found answers are
+bits of a single integer, one bit per position in the puzzle's sorted
+answer list, which is shared with every other player of the same
+puzzle (see puzzlecache.py). Checking for a repeat is one shift, the
+word count is a popcount, bingo is one AND per letter against a mask of
+the answers starting with that letter, and listing the bits from lowest
+to highest gives the words already sorted. A found word that isn't an
+answer of the current list (restored before a dictionary is loaded, or
+removed from a newer dictionary) is kept in a small set on the side, so
+nothing found is ever lost when the answer list changes.
+"""
+
+from heapq import merge
+
+
+
+class FoundWords:
+    """ A class for one player's found words as a bitset over a shared answer list """
+    __slots__ = ("answers", "positions", "bits", "extra")
+
+    def __init__(self, answers: tuple = (), positions: dict = None):
+        self.answers = answers # Sorted tuple of answers (shared, never changed)
+        self.positions = positions if positions is not None else {} # Dictionary of answer keys and index values (shared)
+        self.bits = 0 # Bit i set if answers[i] has been found
+        self.extra = None # Set of found words not in answers (None while there are none)
+
+
+
+    # Purpose: Number of words found, counting set bits instead of storing a count.
+    # Params: None.
+    # Returns: Number of words found.
+    @property
+    def count(self) -> int:
+        return self.bits.bit_count() + (len(self.extra) if self.extra else 0)
+
+
+
+    # Purpose: Return number of words found (same as Trie.wordCount()).
+    # Params: None.
+    # Returns: Number of words found.
+    def wordCount(self) -> int:
+        return self.count
+
+
+
+    # Purpose: Add a found word.
+    # Params: String for word found.
+    # Returns: True if word was added, false if it was already found.
+    def insert(self, word: str) -> bool:
+        position = self.positions.get(word)
+        if position is None:
+            if self.extra is None:
+                self.extra = set()
+            elif word in self.extra:
+                return False
+            self.extra.add(word)
+            return True
+
+        bit = 1 << position
+        if self.bits & bit:
+            return False
+        self.bits |= bit
+        return True
+
+
+
+    # Purpose: Check if a word has been found.
+    # Params: String for word being searched.
+    # Returns: True if word has been found.
+    def search(self, word: str) -> bool:
+        position = self.positions.get(word)
+        if position is None:
+            return self.extra is not None and word in self.extra
+        return self.bits >> position & 1 == 1
+
+
+
+    # Purpose: Forget all found words.
+    # Params: None.
+    # Returns: True after clearing found words.
+    def clear(self) -> bool:
+        self.bits = 0
+        self.extra = None
+        return True
+
+
+
+    # Purpose: Lazily yield found words in sorted order.
+    # Params: None.
+    # Returns: Generator of found words.
+    def iterWords(self):
+        if self.extra:
+            return merge(self._iterAnswers(), sorted(self.extra)) # Both already sorted
+        return self._iterAnswers()
+
+
+
+    # Purpose: Helper function for iterWords() to yield found answers from lowest set bit to highest.
+    # Params: None.
+    # Returns: Generator of found answers in sorted order.
+    def _iterAnswers(self):
+        bits = self.bits
+        answers = self.answers
+        while bits:
+            lowest = bits & -bits
+            yield answers[lowest.bit_length() - 1]
+            bits ^= lowest
+
+
+
+    # Purpose: Build a sorted list of found words.
+    # Params: None.
+    # Returns: Sorted list of found words.
+    def words(self) -> list[str]:
+        return list(self.iterWords())
+
+
+
+    # Purpose: Check if a word starting with each of some letters has been found.
+    # Params: Letters, dictionary of letter keys and masks of answers starting with that letter.
+    # Returns: True if every letter starts at least one found word.
+    def coversLetters(self, letters, letterMasks: dict) -> bool:
+        for letter in letters:
+            if self.bits & letterMasks.get(letter, 0):
+                continue
+            if not self.extra or not any(word[0] == letter for word in self.extra):
+                return False
+        return True
+
+
+
+    # Purpose: Switch to another answer list, such as a new dictionary's answers for the same letters.
+    # Params: Sorted tuple of answers, dictionary of answer keys and index values.
+    # Returns: None (found words are kept, as bits of new list where they are answers and on the side otherwise).
+    def rebase(self, answers: tuple, positions: dict):
+        if answers is self.answers:
+            return
+        found = self.words()
+        self.answers = answers
+        self.positions = positions
+        self.clear()
+        for word in found:
+            self.insert(word)
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Offline Spelling Bee puzzle generator. Every puzzle worth publishing has
+at least one pangram, so its seven letters are exactly the letters of some
+dictionary word. Words are first aggregated by letter mask (answer count
+and points per set of letters), then for every seven-letter mask the
+totals for each choice of central letter come from subset sums:
+answers containing the central letter = sum over all subsets of the seven
+letters - sum over the subsets of the six other letters. Subset sums are
+cached per mask, so masks shared between puzzles are only summed once.
+Work is split across a process pool.
+Run as: python generator.py <filename> [--min-answers N] [--max-answers N] ...
+"""
+
+import argparse
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from sbtrie import SBTrie, letterMask, wordPoints
+
+# One generated puzzle: central letter, other six letters (sorted), number of answers,
+# maximum possible score, and number of pangrams
+Puzzle = namedtuple("Puzzle", ["centralLetter", "otherLetters", "answers", "maxScore", "pangrams"])
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyz"
+ALL_LETTERS = (1 << 26) - 1 # Mask of all letters a-z
+
+_maskStats = {} # Per-process mask keys and [answer count, points without pangram bonus] values
+_subsetSums = {} # Per-process cache of mask keys and summed stats over all subsets of mask
+
+
+
+# Purpose: Aggregate dictionary words by letter mask.
+# Params: Iterable of words.
+# Returns: Dictionary of letter mask keys and [answer count, points without pangram bonus] values,
+# for words at least four letters long using at most seven distinct letters from a-z.
+def aggregateWords(words) -> dict:
+    maskStats = {}
+    for word in words:
+        if len(word) < 4:
+            continue
+        mask = letterMask(word)
+        if mask & ~ALL_LETTERS or mask.bit_count() > 7:
+            continue # Word can never be an answer
+        stats = maskStats.setdefault(mask, [0, 0])
+        stats[0] += 1
+        stats[1] += wordPoints(word, False)
+    return maskStats
+
+
+
+# Purpose: Sum answer counts and points over every subset of a mask.
+# Params: Letter mask.
+# Returns: Tuple of answer count and points for words using only letters in mask.
+def _subsetSum(mask: int) -> tuple:
+    if mask in _subsetSums:
+        return _subsetSums[mask]
+
+    answers = points = 0
+    subset = mask
+    while True:
+        stats = _maskStats.get(subset)
+        if stats:
+            answers += stats[0]
+            points += stats[1]
+        if subset == 0:
+            break
+        subset = (subset - 1) & mask
+    _subsetSums[mask] = (answers, points)
+    return answers, points
+
+
+
+# Purpose: Set up worker process with aggregated mask statistics.
+# Params: Dictionary of mask statistics from aggregateWords().
+# Returns: None (sets module state for worker).
+def _initWorker(maskStats: dict):
+    global _maskStats, _subsetSums
+    _maskStats = maskStats
+    _subsetSums = {}
+
+
+
+# Purpose: Build every puzzle (one per central letter) for a chunk of seven-letter masks.
+# Params: List of seven-letter masks, filter dictionary (see generatePuzzles()).
+# Returns: List of puzzles passing filters.
+def _puzzlesForMasks(masks: list[int], filters: dict) -> list[Puzzle]:
+    puzzles = []
+    for mask in masks:
+        pangrams = _maskStats[mask][0] # Every word using exactly all seven letters is a pangram
+        allAnswers, allPoints = _subsetSum(mask)
+        letters = [ch for ch in ALPHABET if mask & (1 << (ord(ch) - 97))]
+
+        for centralLetter in letters:
+            if centralLetter in filters["centralExclude"]:
+                continue
+            centralBit = 1 << (ord(centralLetter) - 97)
+            withoutAnswers, withoutPoints = _subsetSum(mask & ~centralBit)
+            answers = allAnswers - withoutAnswers # Words that contain central letter
+            maxScore = allPoints - withoutPoints + 7 * pangrams
+
+            if answers < filters["minAnswers"] or maxScore < filters["minScore"]:
+                continue
+            if filters["maxAnswers"] is not None and answers > filters["maxAnswers"]:
+                continue
+            if filters["maxScore"] is not None and maxScore > filters["maxScore"]:
+                continue
+            others = "".join(ch for ch in letters if ch != centralLetter)
+            puzzles.append(Puzzle(centralLetter, others, answers, maxScore, pangrams))
+    return puzzles
+
+
+
+# Purpose: Generate every puzzle with at least one pangram from a dictionary.
+# Params: Dictionary (anything with words()), minimum/maximum answers, minimum/maximum score (None for
+# no maximum), letters that can't be used in a puzzle, letters that can't be central, number of worker processes.
+# Returns: List of puzzles sorted by central letter then other letters.
+def generatePuzzles(dictionary, minAnswers: int = 1, maxAnswers: int = None, minScore: int = 0,
+                    maxScore: int = None, exclude: str = "", centralExclude: str = "",
+                    workers: int = None) -> list[Puzzle]:
+    maskStats = aggregateWords(dictionary.words())
+    excludeMask = letterMask(exclude)
+    masks = sorted(mask for mask in maskStats if mask.bit_count() == 7 and not mask & excludeMask)
+    filters = {"minAnswers": minAnswers, "maxAnswers": maxAnswers, "minScore": minScore,
+               "maxScore": maxScore, "centralExclude": centralExclude}
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(masks) < 1000:
+        _initWorker(maskStats)
+        puzzles = _puzzlesForMasks(masks, filters) # Not worth starting processes
+    else:
+        chunkSize = -(-len(masks) // (workers * 4)) # Several chunks per worker to balance load
+        chunks = [masks[ind:ind + chunkSize] for ind in range(0, len(masks), chunkSize)]
+        puzzles = []
+        with ProcessPoolExecutor(workers, initializer=_initWorker, initargs=(maskStats,)) as pool:
+            for chunkPuzzles in pool.map(_puzzlesForMasks, chunks, [filters] * len(chunks)):
+                puzzles.extend(chunkPuzzles)
+
+    puzzles.sort()
+    return puzzles
+
+
+
+# Purpose: Main function for puzzle generator.
+# Params: None, reads command line arguments.
+# Returns: None (prints one puzzle per line: seven letters with central letter first, answers, max score, pangrams).
+def main():
+    parser = argparse.ArgumentParser(description="Generate every Spelling Bee puzzle with a pangram")
+    parser.add_argument("filename", help="word list or compiled dictionary")
+    parser.add_argument("--min-answers", type=int, default=1)
+    parser.add_argument("--max-answers", type=int)
+    parser.add_argument("--min-score", type=int, default=0)
+    parser.add_argument("--max-score", type=int)
+    parser.add_argument("--exclude", default="", help="letters never used in puzzles")
+    parser.add_argument("--central-exclude", default="", help="letters never used as central letter")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    dictionary = SBTrie()
+    if not dictionary.getFromFile(args.filename):
+        parser.error(f"could not read {args.filename}")
+
+    puzzles = generatePuzzles(dictionary, args.min_answers, args.max_answers, args.min_score,
+                              args.max_score, args.exclude, args.central_exclude, args.workers)
+    for puzzle in puzzles:
+        print(f"{puzzle.centralLetter}{puzzle.otherLetters} {puzzle.answers} {puzzle.maxScore} {puzzle.pangrams}")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in instrumentation for Trie and SBTrie. Turning it on replaces the
+public methods (insert, search, remove, sbWords, getFromFile) on that one
+trie object with wrappers that count calls, time them, and count nodes
+visited and allocated, search hits and misses. Turning it off deletes the
+wrappers so the class methods are used again, so an uninstrumented trie
+pays nothing. A hook function can be given to forward every sample (for
+example to a metrics system) as it is recorded. Node count and estimated
+memory come from walking the trie when asked for.
+"""
+
+import sys
+import time
+
+from shards import ShardedDictionary
+from trie import EMPTY_CHILDREN
+
+METHODS = ("insert", "search", "remove", "sbWords", "getFromFile") # Public methods that get wrapped
+
+
+
+class Instrumentation:
+    """ A class for counters and timings collected from one trie """
+    def __init__(self, hook = None):
+        self.hook = hook # Function called with method name, seconds, and counts for every sample
+        self.counters = {"nodesVisited": 0, "nodesAllocated": 0, "searchHits": 0, "searchMisses": 0}
+        self.timings = {} # Method name keys and [calls, total seconds, max seconds] values
+
+
+
+    # Purpose: Record one call to an instrumented method.
+    # Params: Method name, seconds taken, dictionary of counter names and amounts to add.
+    # Returns: None (updates counters and timings, forwards sample to hook).
+    def record(self, method: str, seconds: float, counts: dict):
+        timing = self.timings.setdefault(method, [0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += seconds
+        if seconds > timing[2]:
+            timing[2] = seconds
+        for name, amount in counts.items():
+            self.counters[name] += amount
+        if self.hook is not None:
+            self.hook(method, seconds, counts)
+
+
+
+    # Purpose: Report collected statistics.
+    # Params: None.
+    # Returns: Dictionary of counters and per-method calls, total, average, and max milliseconds.
+    def stats(self) -> dict:
+        methods = {}
+        for method, (calls, total, longest) in self.timings.items():
+            methods[method] = {"calls": calls, "totalMs": total * 1e3, "avgMs": total / calls * 1e3, "maxMs": longest * 1e3}
+        return {"counters": dict(self.counters), "methods": methods}
+
+
+
+# Purpose: Find how many characters of a word already have a path in the trie.
+# Params: Trie, word.
+# Returns: Length of longest prefix of word stored in trie.
+def prefixDepth(trie, word: str) -> int:
+    curr = trie.root
+    depth = 0
+    for ch in word:
+        curr = curr.children.get(ch.lower())
+        if curr is None:
+            break
+        depth += 1
+    return depth
+
+
+
+# Purpose: Count nodes and estimate memory used by a trie's nodes.
+# Params: Trie.
+# Returns: Dictionary of node count and estimated bytes.
+def trieSize(trie) -> dict:
+    nodes = 0
+    memory = 0
+    stack = [trie.root]
+    while stack:
+        curr = stack.pop()
+        nodes += 1
+        memory += sys.getsizeof(curr)
+        if hasattr(curr, "__dict__"):
+            memory += sys.getsizeof(curr.__dict__)
+        if curr.children is not EMPTY_CHILDREN: # Shared by all compact leaves, so not counted per node
+            memory += sys.getsizeof(curr.children)
+        stack.extend(curr.children.values())
+    return {"nodes": nodes, "estimatedBytes": memory}
+
+
+
+# Purpose: Turn on instrumentation for a trie.
+# Params: Trie or SBTrie, optional hook function called with method name, seconds, and counts for every sample.
+# Returns: Instrumentation collecting trie's statistics (also kept in trie.instrumentation).
+def enableInstrumentation(trie, hook = None) -> Instrumentation:
+    disableInstrumentation(trie)
+    instrumentation = Instrumentation(hook)
+    trie.instrumentation = instrumentation
+    clock = time.perf_counter
+
+    # Original bound methods, called by wrappers
+    insert, search, remove = trie.insert, trie.search, trie.remove
+    getFromFile = trie.getFromFile
+    sbWords = getattr(trie, "sbWords", None)
+
+    def timedInsert(word):
+        before = prefixDepth(trie, word)
+        start = clock()
+        result = insert(word)
+        seconds = clock() - start
+        allocated = prefixDepth(trie, word) - before # Nodes on path that didn't exist before
+        instrumentation.record("insert", seconds, {"nodesVisited": len(word) + 1, "nodesAllocated": allocated})
+        return result
+
+    def timedSearch(word):
+        start = clock()
+        result = search(word)
+        seconds = clock() - start
+        counts = {"nodesVisited": prefixDepth(trie, word) + 1}
+        counts["searchHits" if result else "searchMisses"] = 1
+        instrumentation.record("search", seconds, counts)
+        return result
+
+    def timedRemove(word):
+        visited = prefixDepth(trie, word) + 1
+        start = clock()
+        result = remove(word)
+        instrumentation.record("remove", clock() - start, {"nodesVisited": visited})
+        return result
+
+    def timedGetFromFile(filename, progress = None):
+        start = clock()
+        result = getFromFile(filename, progress) # Inserts are recorded separately through timedInsert
+        instrumentation.record("getFromFile", clock() - start, {})
+        return result
+
+    def timedSbWords(centralLetter, otherLetters):
+        start = clock()
+        result = sbWords(centralLetter, otherLetters)
+        instrumentation.record("sbWords", clock() - start, {})
+        return result
+
+    # Instance attributes take priority over class methods
+    trie.insert, trie.search, trie.remove = timedInsert, timedSearch, timedRemove
+    trie.getFromFile = timedGetFromFile
+    if sbWords is not None:
+        trie.sbWords = timedSbWords
+    return instrumentation
+
+
+
+# Purpose: Turn off instrumentation for a trie.
+# Params: Trie or SBTrie.
+# Returns: None (removes wrappers so class methods are called directly again).
+def disableInstrumentation(trie):
+    for method in METHODS:
+        trie.__dict__.pop(method, None)
+    trie.instrumentation = None
+
+
+
+# Purpose: Build a report of trie statistics.
+# Params: Trie or SBTrie.
+# Returns: Dictionary of word count, node count, estimated memory, instrumentation statistics (None if off),
+# puzzle cache statistics for SBTrie, and shard statistics for SBTrie with a sharded base dictionary.
+def report(trie) -> dict:
+    stats = {"words": trie.wordCount()}
+    stats.update(trieSize(trie))
+    instrumentation = getattr(trie, "instrumentation", None)
+    stats["instrumentation"] = instrumentation.stats() if instrumentation is not None else None
+    if hasattr(trie, "puzzleCache"):
+        stats["puzzleCache"] = trie.puzzleCache.stats()
+    if isinstance(getattr(trie, "base", None), ShardedDictionary):
+        stats["shards"] = trie.base.stats()
+    return stats
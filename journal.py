@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Append-only journal of game sessions for crash recovery. Every new letter
+set and every accepted word of an attached session is appended as one
+tab-separated line with a sequence number. Lines are buffered and the
+file is flushed and fsynced once per batch of records (or when enough
+time has passed), so a crash loses at most the last unsynced batch.
+Every so many records the journal is compacted: the state of all
+attached sessions is written to a snapshot file (replaced atomically)
+and the journal starts over, which bounds how much has to be replayed.
+Recovery loads the snapshot, folds the journal records after it into
+plain per-session state, and restores each session directly from that
+state, without checking any word against the dictionary again.
+Run as: python journal.py [--records N] [--sessions N] (times writing and recovering a synthetic journal)
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+
+from foundwords import FoundWords
+from sbtrie import SBSession, SBTrie
+
+SYNC_EVERY = 256 # Records written between fsyncs
+SYNC_INTERVAL = 1.0 # Most seconds an unsynced record waits for next fsync (checked when records are written)
+COMPACT_EVERY = 100000 # Records written between compactions
+
+
+
+class SessionJournal:
+    """ A class for an append-only journal of game sessions with snapshot compaction """
+    def __init__(self, filename: str, syncEvery: int = SYNC_EVERY, syncInterval: float = SYNC_INTERVAL,
+                 compactEvery: int = COMPACT_EVERY):
+        self.filename = filename # Journal file, snapshot is kept next to it with .snapshot added
+        self.snapshotFile = filename + ".snapshot"
+        self.syncEvery = syncEvery
+        self.syncInterval = syncInterval
+        self.compactEvery = compactEvery
+        self.sessions = {} # Session id keys and attached session values
+        self.savedStates = {} # Session id keys and state values for sessions not attached (kept in snapshots)
+        self.sequence = 0 # Sequence number of last record written
+        self.unsynced = 0 # Records written since last fsync
+        self.lastSync = time.monotonic()
+        self.sinceCompact = 0 # Records written since last compaction
+        self.journalFile = None # Opened for appending by recover()
+
+
+
+    # Purpose: Read snapshot and journal, and open journal for appending new records.
+    # Params: None.
+    # Returns: Dictionary of session id keys and state dictionary values (letters, words, score, pangram and bingo flags).
+    def recover(self) -> dict:
+        states = {}
+        if os.path.exists(self.snapshotFile):
+            with open(self.snapshotFile, "r") as snapshotFile:
+                snapshot = json.load(snapshotFile)
+            states = snapshot["sessions"]
+            self.sequence = snapshot["sequence"]
+
+        if os.path.exists(self.filename):
+            complete = 0 # Bytes up to end of last complete record
+            with open(self.filename, "rb") as journalFile:
+                for line in journalFile:
+                    if not line.endswith(b"\n"):
+                        break # Partly written last line from a crash
+                    complete += len(line)
+                    fields = line.decode("utf-8").rstrip("\n").split("\t")
+                    if len(fields) < 4 or not fields[0].isdigit():
+                        continue
+                    sequence = int(fields[0])
+                    if sequence <= self.sequence:
+                        continue # Already in snapshot (crash during compaction)
+                    self.sequence = sequence
+
+                    # Records are: sequence, session id, L, central letter, other letters
+                    # or: sequence, session id, W, word, points, flags (p for pangram, b for bingo)
+                    # or: sequence, session id, S, whole state as JSON (session attached mid-game)
+                    sessionId, kind = fields[1], fields[2]
+                    if kind == "L" and len(fields) == 5:
+                        states[sessionId] = newState(fields[3], fields[4])
+                    elif kind == "S":
+                        try:
+                            states[sessionId] = json.loads(fields[3])
+                        except ValueError:
+                            continue # Damaged state is skipped like a partly written record
+                    elif kind == "W" and sessionId in states and len(fields) == 6:
+                        state = states[sessionId]
+                        state["words"].append(fields[3])
+                        state["score"] += int(fields[4])
+                        if "p" in fields[5]:
+                            state["pangramFound"] = True
+                        if "b" in fields[5]:
+                            state["bingoFound"] = True
+
+            # Partly written last line is cut off, so new records don't get appended to it
+            if os.path.getsize(self.filename) > complete:
+                os.truncate(self.filename, complete)
+
+        self.journalFile = open(self.filename, "a", encoding="utf-8")
+        self.savedStates = dict(states)
+        return states
+
+
+
+    # Purpose: Attach a session so its new letters and accepted words are journaled.
+    # Params: Session id (no tabs or line breaks), SBSession (or SBTrie), optional state from recover() to restore
+    # (without it, session's current state is journaled).
+    # Returns: None (restores and attaches session).
+    def attach(self, sessionId: str, session, state: dict = None):
+        session.journal = self
+        session.journalId = sessionId
+        self.sessions[sessionId] = session
+        self.savedStates.pop(sessionId, None) # Attached session's own state is saved from now on
+        if state is not None:
+            restore(session, state)
+        else:
+            self._append(f"{sessionId}\tS\t{json.dumps(sessionState(session), separators=(',', ':'))}")
+
+
+
+    # Purpose: Detach a session so it is no longer journaled or included in snapshots.
+    # Params: Session id.
+    # Returns: None (detaches session, its state is still kept in journal and snapshots).
+    def detach(self, sessionId: str):
+        session = self.sessions.pop(sessionId, None)
+        if session is not None:
+            session.journal = None
+            self.savedStates[sessionId] = sessionState(session)
+
+
+
+    # Purpose: Journal a new letter set.
+    # Params: Session that set its letters.
+    # Returns: None (appends record).
+    def recordLetters(self, session):
+        self._append(f"{session.journalId}\tL\t{session.centralLetter}\t{session.otherLetters}")
+
+
+
+    # Purpose: Journal an accepted word.
+    # Params: Session that found word, word, points earned, if word is a pangram, if word scored a bingo.
+    # Returns: None (appends record).
+    def recordWord(self, session, word: str, points: int, pangram: bool, bingo: bool):
+        flags = ("p" if pangram else "") + ("b" if bingo else "") or "-"
+        self._append(f"{session.journalId}\tW\t{word}\t{points}\t{flags}")
+
+
+
+    # Purpose: Helper function to append one record, syncing and compacting when due.
+    # Params: Record without sequence number.
+    # Returns: None (writes record).
+    def _append(self, record: str):
+        self.sequence += 1
+        self.journalFile.write(f"{self.sequence}\t{record}\n")
+        self.unsynced += 1
+        self.sinceCompact += 1
+        if self.unsynced >= self.syncEvery or time.monotonic() - self.lastSync >= self.syncInterval:
+            self.sync()
+        if self.sinceCompact >= self.compactEvery:
+            self.compact()
+
+
+
+    # Purpose: Write buffered records to disk.
+    # Params: None.
+    # Returns: None (flushes and fsyncs journal).
+    def sync(self):
+        self.journalFile.flush()
+        os.fsync(self.journalFile.fileno())
+        self.unsynced = 0
+        self.lastSync = time.monotonic()
+
+
+
+    # Purpose: Write state of all attached sessions to snapshot and start an empty journal.
+    # Params: None.
+    # Returns: None (replaces snapshot file and truncates journal).
+    def compact(self):
+        self.sync()
+        states = dict(self.savedStates)
+        for sessionId, session in self.sessions.items():
+            states[sessionId] = sessionState(session)
+        snapshot = {"sequence": self.sequence, "sessions": states}
+
+        # New snapshot replaces old one only once it is completely on disk, and records it
+        # already holds are skipped by recover() if journal isn't truncated before a crash
+        tempName = self.snapshotFile + ".tmp"
+        with open(tempName, "w") as snapshotFile:
+            json.dump(snapshot, snapshotFile, separators=(",", ":"))
+            snapshotFile.flush()
+            os.fsync(snapshotFile.fileno())
+        os.replace(tempName, self.snapshotFile)
+
+        self.journalFile.close()
+        self.journalFile = open(self.filename, "w", encoding="utf-8")
+        self.sinceCompact = 0
+
+
+
+    # Purpose: Sync and close journal.
+    # Params: None.
+    # Returns: None.
+    def close(self):
+        if self.journalFile is not None:
+            self.sync()
+            self.journalFile.close()
+            self.journalFile = None
+
+
+
+# Purpose: Create state for a session that just set its letters.
+# Params: String for central letter, string for other six letters.
+# Returns: State dictionary with no words found.
+def newState(centralLetter: str, otherLetters: str) -> dict:
+    return {"centralLetter": centralLetter, "otherLetters": otherLetters, "words": [], "score": 0,
+            "pangramFound": False, "bingoFound": False}
+
+
+
+# Purpose: Capture state of a session.
+# Params: SBSession (or SBTrie).
+# Returns: State dictionary of letters, found words, score, pangram and bingo flags.
+def sessionState(session) -> dict:
+    state = newState(session.centralLetter, session.otherLetters)
+    state["words"] = session.discoveredWords.words()
+    state["score"] = session.score
+    state["pangramFound"] = session.pangramFound
+    state["bingoFound"] = session.bingoFound
+    return state
+
+
+
+# Purpose: Restore a session from saved state, trusting it instead of checking words against dictionary.
+# Params: SBSession (or SBTrie), state dictionary.
+# Returns: None (replaces session's letters, found words, score, pangram and bingo flags).
+def restore(session, state: dict):
+    session.centralLetter = state["centralLetter"]
+    session.otherLetters = state["otherLetters"]
+    session.discoveredWords = FoundWords() # Words are moved into bits of answer list on next use
+    for word in state["words"]:
+        session.discoveredWords.insert(word)
+    session.score = state["score"]
+    session.pangramFound = state["pangramFound"]
+    session.bingoFound = state["bingoFound"]
+    session.puzzleKey = None # Answers and letter set are looked up again on next use
+
+
+
+# Purpose: Main function for journal benchmark.
+# Params: None, reads command line arguments.
+# Returns: None (prints time to write, recover, compact, and restore sessions from a synthetic journal).
+def main():
+    parser = argparse.ArgumentParser(description="Time writing and recovering a session journal")
+    parser.add_argument("--records", type=int, default=1000000)
+    parser.add_argument("--sessions", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=2024)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    dictionary = SBTrie()
+
+    with tempfile.TemporaryDirectory() as tempDir:
+        # Compaction is turned off so recovery replays every record
+        journal = SessionJournal(os.path.join(tempDir, "sessions.journal"), compactEvery=args.records + 1)
+        journal.recover()
+        start = time.perf_counter()
+        sessions = []
+        for ind in range(args.sessions):
+            session = SBSession(dictionary)
+            session.centralLetter, session.otherLetters = "a", "bcdefg"
+            journal.attach(str(ind), session) # Journals letters and (still empty) found words
+            sessions.append(session)
+        for _ in range(args.records - args.sessions):
+            session = rng.choice(sessions)
+            word = "a" + "".join(rng.choice("abcdefg") for _ in range(rng.randint(3, 9)))
+            journal.recordWord(session, word, len(word), False, False)
+        journal.close()
+        elapsed = time.perf_counter() - start
+        print(f"write: {args.records} records ({os.path.getsize(journal.filename) / 2**20:.1f} MB) in {elapsed:.2f} s")
+
+        start = time.perf_counter()
+        journal = SessionJournal(journal.filename)
+        states = journal.recover()
+        print(f"recover: {len(states)} sessions from {args.records} records in {time.perf_counter() - start:.2f} s")
+
+        # Sessions are restored when their players come back, so restore cost is per session
+        sample = rng.sample(sorted(states), min(1000, len(states)))
+        start = time.perf_counter()
+        for sessionId in sample:
+            journal.attach(sessionId, SBSession(dictionary), states[sessionId])
+        elapsed = time.perf_counter() - start
+        print(f"restore: {elapsed / len(sample) * 1e3:.3f} ms per session "
+              f"({sum(len(states[sessionId]['words']) for sessionId in sample) / len(sample):.0f} words each)")
+
+        start = time.perf_counter()
+        journal.compact()
+        journal.close()
+        compacted = time.perf_counter() - start
+        start = time.perf_counter()
+        journal = SessionJournal(journal.filename)
+        journal.recover()
+        journal.close()
+        print(f"compact: {compacted:.2f} s, recover from snapshot: {time.perf_counter() - start:.2f} s")
+
+
+
+if __name__ == "__main__":
+    main()
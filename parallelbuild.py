@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel dictionary build. The main process reads and splits the word
+file once, in chunks (see trie.readChunks()), lowercases and checks
+each word as a serial getFromFile() would, and groups the words by
+first letter (the keys of the root's children). Each group is sent to a
+worker process, which drops repeated words, sorts the rest, and, for
+SBTrie, builds their letter mask index entries. Workers send back only
+plain lists of words and index entries, which are cheap to pickle, and
+the main process builds each first letter's subtree from its sorted
+words as soon as they arrive, while other workers are still sorting
+and indexing. Subtrees are hung under the root in the order their first
+letters appear in the file, and load statistics add up to the same
+counts as a serial build. The cyclic garbage collector is paused for
+the whole build, since millions of new objects that are never garbage
+would otherwise trigger it over and over (it more than doubles build
+time). Only the per-word work of sorting and indexing runs in parallel,
+since nodes have to be created in the process that keeps them.
+Run as: python parallelbuild.py <filename> [--workers N] [--compare]
+"""
+
+import argparse
+import gc
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from dictfile import isCompiled
+from shards import isSharded
+from sbtrie import SBTrie, indexWords
+from trie import EMPTY_CHILDREN, Trie, Node, CompactNode, readChunks
+
+
+
+# Purpose: Sort the words of one first letter and build their letter mask index entries.
+# Params: List of words (lowercase letters only, in file order, repeats allowed), if index entries are built.
+# Returns: Tuple of sorted list of distinct words, and dictionary of letter mask keys and lists of words
+# at least four letters long (None if index isn't built).
+def _sortShard(words: list[str], index: bool) -> tuple:
+    words = sorted(set(words))
+    if not index:
+        return words, None
+    answerIndex = {}
+    indexWords(answerIndex, [word for word in words if len(word) >= 4]) # Only words long enough to be answers
+    return words, answerIndex
+
+
+
+# Purpose: Add sorted words that aren't in trie yet, skipping the checks insert() makes on every character.
+# Params: Trie, sorted list of distinct words (lowercase letters only).
+# Returns: None (adds nodes and updates count and version as insert() would).
+def _addWords(trie, words: list[str]):
+    root = trie.root
+    nodeType = trie.nodeType
+    for word in words:
+        curr = root
+        for ch in word:
+            child = curr.children.get(ch)
+            if child is None:
+                if curr.children is EMPTY_CHILDREN:
+                    curr.children = {} # Compact leaf gets its own dictionary in place of shared read-only one
+                child = curr.children[ch] = nodeType(ch)
+            curr = child
+        curr.isWord = True
+    trie.count += len(words)
+    trie.version += len(words) # One version per word inserted, as with insert()
+
+
+
+# Purpose: Load words from a file into an empty trie, sorting and indexing each first letter's words in parallel worker processes.
+# Params: Empty Trie or SBTrie, name of plain word list file, number of worker processes (all cores by default).
+# Returns: True if operation is successful, false if not (same as getFromFile(), which is used instead
+# for a single worker, a trie that already has words, or a compiled file or shard directory).
+def loadParallel(trie, filename: str, workers: int = None) -> bool:
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or trie.count or trie.root.children or isCompiled(filename) or isSharded(filename):
+        return trie.getFromFile(filename) # Nothing to gain, existing words would need merging, or file is memory-mapped
+
+    stats = {"characters": 0, "accepted": 0, "rejected": 0, "duplicates": 0}
+    answerIndex = getattr(trie, "answerIndex", None) # Only SBTrie has a letter mask index
+    gcEnabled = gc.isenabled()
+    gc.disable() # Kept off until every node is built and every index entry merged
+    try:
+        # Words grouped by first letter, in order each letter first starts a valid word (as root's children are in a serial build)
+        shards = {}
+        try:
+            with open(filename, "r") as wordFile:
+                for tokens in readChunks(wordFile, stats):
+                    for word in tokens:
+                        word = word.lower()
+                        if not word.isalpha():
+                            stats["rejected"] += 1
+                            continue
+                        shard = shards.get(word[0])
+                        if shard is None:
+                            shards[word[0]] = [word]
+                        else:
+                            shard.append(word)
+        except (OSError, UnicodeDecodeError):
+            return False # Opening or reading file unsuccessful
+
+        # Results arrive in submission order, so each subtree is built while later shards are still being sorted
+        with ProcessPoolExecutor(workers) as pool:
+            results = pool.map(_sortShard, shards.values(), repeat(answerIndex is not None))
+            for shardWords, (words, shardIndex) in zip(shards.values(), results):
+                _addWords(trie, words) # Already checked, and SBTrie's index entries come from worker
+                stats["accepted"] += len(words)
+                stats["duplicates"] += len(shardWords) - len(words)
+                if shardIndex:
+                    for mask, maskWords in shardIndex.items():
+                        bucket = answerIndex.get(mask)
+                        if bucket is None:
+                            answerIndex[mask] = maskWords
+                        else:
+                            bucket.extend(maskWords)
+    finally:
+        if gcEnabled:
+            gc.enable()
+
+    trie.loadStats = stats
+    return True
+
+
+
+# Purpose: Check if two tries have the same nodes (children below root may be in a different order).
+# Params: Two tries.
+# Returns: True if every node matches and root's children are in the same order.
+def sameTrie(first: Trie, second: Trie) -> bool:
+    if first.count != second.count or list(first.root.children) != list(second.root.children):
+        return False
+    stack = [(first.root, second.root)]
+    while stack:
+        one, two = stack.pop()
+        if one.isWord != two.isWord or one.children.keys() != two.children.keys():
+            return False
+        stack.extend((child, two.children[ch]) for ch, child in one.children.items())
+    return True
+
+
+
+# Purpose: Main function for parallel build.
+# Params: None, reads command line arguments.
+# Returns: None (prints build time, and serial build times and if tries match with --compare).
+def main():
+    parser = argparse.ArgumentParser(description="Build a dictionary with a pool of worker processes")
+    parser.add_argument("filename")
+    parser.add_argument("--workers", type=int, help="worker processes (default: all cores)")
+    parser.add_argument("--compact", action="store_true", help="use compact nodes")
+    parser.add_argument("--compare", action="store_true", help="also build serially (with and without collector) and check tries are identical")
+    args = parser.parse_args()
+    nodeType = CompactNode if args.compact else Node
+
+    start = time.perf_counter()
+    trie = SBTrie(nodeType)
+    if not loadParallel(trie, args.filename, args.workers):
+        raise SystemExit(f"could not read {args.filename}")
+    print(f"parallel: {trie.wordCount()} words in {time.perf_counter() - start:.2f} s")
+
+    if args.compare:
+        # Serial build is timed as is, and again with collector off as parallel build has it
+        for label, collect in (("serial", True), ("serial, GC off", False)):
+            serial = None
+            gc.collect()
+            if not collect:
+                gc.disable()
+            start = time.perf_counter()
+            serial = SBTrie(nodeType)
+            serial.getFromFile(args.filename)
+            print(f"{label}: {serial.wordCount()} words in {time.perf_counter() - start:.2f} s")
+            gc.enable()
+
+        # Index lists may be in another order, since sbWords() sorts its results anyway
+        sameIndex = {mask: sorted(words) for mask, words in trie.answerIndex.items()} == \
+                    {mask: sorted(words) for mask, words in serial.answerIndex.items()}
+        print("identical" if sameTrie(trie, serial) and sameIndex and trie.loadStats == serial.loadStats else "DIFFERENT")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of puzzle answers shared by every player of the same letters.
+Entries are keyed by dictionary version, central letter, and other
+letters, and hold the sorted answers, points per answer, pangrams, the
+maximum score, hint counts (answers per first letter, per first
+letter and length, and per two-letter start), a small trie of the
+answers for "did you mean" suggestions, each answer's position with
+masks of positions per first letter (for players' found-word bitsets,
+see foundwords.py), and the set of the seven letters. Players keep only
+references to these, never copies. The cache is bounded in size and
+evicts the least recently used puzzle first. Any change to the
+dictionary bumps its version, so entries from an older version are
+never served (they are dropped on the first lookup with the new
+version).
+"""
+
+from collections import OrderedDict, namedtuple
+
+# Answers for one puzzle: sorted tuple of answers, dictionary of answer keys and point values,
+# frozenset of pangrams, maximum possible score, dictionary of first letter keys and answer counts,
+# dictionary of (first letter, length) keys and answer counts, dictionary of two letter prefix keys and
+# answer counts, frozenset of perfect pangrams (pangrams using each letter exactly once), Trie of answers,
+# dictionary of answer keys and index values, dictionary of first letter keys and bitmasks of answer indexes,
+# and frozenset of puzzle's letters
+PuzzleAnswers = namedtuple("PuzzleAnswers", ["answers", "points", "pangrams", "maxScore", "firstLetterCounts",
+                                             "lengthCounts", "prefixCounts", "perfectPangrams", "answerTrie",
+                                             "positions", "letterMasks", "letterSet"])
+
+
+
+class PuzzleCache:
+    """ A class for a size-bounded LRU cache of puzzle answers """
+    def __init__(self, maxSize: int = 1024):
+        self.maxSize = maxSize # Most puzzles kept before least recently used one is evicted
+        self.entries = OrderedDict() # Key tuples and PuzzleAnswers values, least recently used first
+        self.version = None # Dictionary version of cached entries
+        self.hits = 0 # Lookups answered from cache
+        self.misses = 0 # Lookups that had to build answers
+
+
+
+    # Purpose: Retrieve answers for a puzzle, building and caching them if not already cached.
+    # Params: Dictionary version, central letter, other six letters, function that builds PuzzleAnswers.
+    # Returns: PuzzleAnswers for puzzle.
+    def get(self, version: int, centralLetter: str, otherLetters: str, build) -> PuzzleAnswers:
+        if version != self.version:
+            self.entries.clear() # Dictionary changed, so every cached puzzle is stale
+            self.version = version
+
+        key = (version, centralLetter, "".join(sorted(otherLetters)))
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key) # Mark as most recently used
+            return entry
+
+        self.misses += 1
+        entry = build()
+        self.entries[key] = entry
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False) # Evict least recently used puzzle
+        return entry
+
+
+
+    # Purpose: Remove all cached puzzles.
+    # Params: None.
+    # Returns: None (empties cache, counters are kept).
+    def clear(self):
+        self.entries.clear()
+
+
+
+    # Purpose: Report cache statistics.
+    # Params: None.
+    # Returns: Dictionary of cached puzzle count, maximum size, hits, and misses.
+    def stats(self) -> dict:
+        return {"size": len(self.entries), "maxSize": self.maxSize, "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,410 @@
+# -*- coding: utf-8 -*-
+"""
+Query engine for Trie and SBTrie: prefix autocomplete (top k shortest
+words, or top k by Spelling Bee score), wildcard patterns ("?" for one
+letter, "*" for any run of letters, including none), and words that can
+be spelled from a multiset of letters ("?" for a blank that can be any
+letter). Every query walks only the part of the trie that can still
+match: autocomplete starts at the prefix's node and can be limited to a
+set of letters, patterns follow only children the next pattern character
+allows, and multiset queries follow only letters still available.
+Highest scoring autocomplete expands the subtree with the best possible
+score first and stops once k words beat every subtree left, using the
+length of the longest word below nodes near the prefix (cached until
+the trie changes). Words in an SBTrie's memory-mapped base dictionary
+have no nodes to walk, so they are found from the sorted word list
+instead: by binary search on the longest fixed prefix where there is
+one, and for multiset queries by walking the list as a trie whose nodes
+are ranges of words sharing a prefix, mapping only the shards of letters
+in the rack.
+Run as: python query.py <filename> complete <prefix> [-k N] [--by length|score] [--letters LETTERS]
+        python query.py <filename> match <pattern>
+        python query.py <filename> letters <letters> [--exact]
+"""
+
+import argparse
+import heapq
+import re
+import time
+import weakref
+from bisect import insort
+from collections import Counter
+from itertools import chain
+
+from sbtrie import SBTrie, wordPoints
+from shards import ShardedDictionary
+
+LONGEST_DEPTH = 3 # Levels below a node whose longest word lengths are cached when they are first needed
+
+_longestCache = weakref.WeakKeyDictionary() # Trie keys and (version, dictionary of prefix keys and longest word length) values
+
+
+
+# Purpose: Find node at end of a prefix.
+# Params: Trie, lowercase prefix.
+# Returns: Node for last letter of prefix (root for empty prefix), None if no word starts with prefix.
+def prefixNode(trie, prefix: str):
+    curr = trie.root
+    for ch in prefix:
+        curr = curr.children.get(ch)
+        if curr is None:
+            return None
+    return curr
+
+
+
+# Purpose: Helper function to yield active base dictionary words of an SBTrie that start with a prefix.
+# Params: Trie or SBTrie, lowercase prefix.
+# Returns: Generator of words in sorted order (nothing for a trie without base dictionary).
+def _baseWords(trie, prefix: str):
+    base = getattr(trie, "base", None)
+    if base is None:
+        return
+    for word in base.iterWords(prefix):
+        if word not in trie.baseRemoved:
+            yield word
+
+
+
+# Purpose: Helper function to score a word for autocomplete.
+# Params: Word, set of puzzle letters (None if not playing a puzzle).
+# Returns: Spelling Bee points for word (pangram bonus only counted with puzzle letters).
+def _score(word: str, letters) -> int:
+    return wordPoints(word, letters is not None and len(letters) == 7 and set(word) == letters)
+
+
+
+# Purpose: Autocomplete a prefix.
+# Params: Trie or SBTrie, prefix, number of words wanted, "length" for shortest words first or "score"
+# for highest Spelling Bee score first, optional letters words may use (like a puzzle's seven letters),
+# shortest word length wanted.
+# Returns: Up to k words starting with prefix, shortest (or highest scoring) first, ties in alphabetical order.
+def complete(trie, prefix: str, k: int = 10, by: str = "length", letters: str = None, minLength: int = 1) -> list[str]:
+    prefix = prefix.lower()
+    letters = set(letters.lower()) if letters else None
+    if by not in ("length", "score"):
+        raise ValueError(f"unknown ordering {by}")
+    if k <= 0 or (letters is not None and not letters.issuperset(prefix)):
+        return []
+
+    if by == "length":
+        found = _shortest(prefixNode(trie, prefix), prefix, k, letters, minLength)
+        rank = lambda word: (len(word), word)
+    else:
+        found = _highestScoring(trie, prefixNode(trie, prefix), prefix, k, letters, minLength)
+        rank = lambda word: (-_score(word, letters), word)
+
+    # Base words are streamed through, so only k of them are kept at once
+    baseWords = (word for word in _baseWords(trie, prefix)
+                 if len(word) >= minLength and (letters is None or letters.issuperset(word)))
+    return heapq.nsmallest(k, chain(found, baseWords), key=rank)
+
+
+
+# Purpose: Helper function for complete() to find shortest words below a node, one level at a time.
+# Params: Node (None for no words), letters on path to node, number of words wanted, allowed letters (None for all),
+# shortest word length wanted.
+# Returns: List of at least k shortest words below node (all of them if fewer), in order of length.
+def _shortest(node, prefix: str, k: int, letters, minLength: int) -> list[str]:
+    found = []
+    level = [(node, prefix)] if node is not None else []
+
+    # Breadth first, so traversal stops at first level where k words have been found
+    while level and len(found) < k:
+        nextLevel = []
+        for curr, word in level:
+            if curr.isWord and len(word) >= minLength:
+                found.append(word)
+            for ch, child in curr.children.items():
+                if letters is None or ch in letters:
+                    nextLevel.append((child, word + ch))
+        level = nextLevel
+    return found
+
+
+
+# Purpose: Helper function for complete() to find highest scoring words below a node, best bound first.
+# Params: Trie, node (None for no words), letters on path to node, number of words wanted, allowed letters (None for all),
+# shortest word length wanted.
+# Returns: List of k highest scoring words below node (all of them if fewer), highest first, ties in alphabetical order.
+def _highestScoring(trie, node, prefix: str, k: int, letters, minLength: int) -> list[str]:
+    if node is None:
+        return []
+    longest = _longestLengths(trie)
+    bonus = letters is not None and len(letters) == 7 # Any word could be a pangram, so bounds include its bonus
+    found = [] # Up to k (negative score, word) pairs, best first
+
+    # Nodes are expanded highest bound first, where a node's bound is the score its subtree's longest word could have.
+    # Every word below a node ranks no better than (bound, node's letters), so search stops as soon as the best node
+    # left can't beat k words already found
+    nodeLongest = longest.get(prefix)
+    if nodeLongest is None:
+        nodeLongest = _longestBelow(node, prefix, longest)
+    frontier = [(-_scoreBound(nodeLongest, bonus), prefix, node)]
+    while frontier and (len(found) < k or frontier[0][:2] < found[-1]):
+        bound, word, curr = heapq.heappop(frontier)
+        if curr.isWord and len(word) >= minLength:
+            insort(found, (-_score(word, letters), word))
+            del found[k:]
+        for ch, child in curr.children.items():
+            if letters is None or ch in letters:
+                childWord = word + ch
+                childLongest = longest.get(childWord)
+                if childLongest is None:
+                    _longestBelow(curr, word, longest) # Caches lengths for next few levels below curr
+                    childLongest = longest[childWord]
+                heapq.heappush(frontier, (-_scoreBound(childLongest, bonus), childWord, child))
+    return [word for score, word in found]
+
+
+
+# Purpose: Helper function for _highestScoring() to retrieve cached longest word lengths for a trie's current version.
+# Params: Trie.
+# Returns: Dictionary of prefix keys and length of longest word starting with prefix (emptied when trie changes).
+def _longestLengths(trie) -> dict:
+    version, longest = _longestCache.get(trie, (None, None))
+    if version != trie.version:
+        longest = {}
+        _longestCache[trie] = (trie.version, longest)
+    return longest
+
+
+
+# Purpose: Helper function for _highestScoring() to find length of longest word below a node, caching it for
+# the node and nodes up to LONGEST_DEPTH levels below it (walks whole subtree, so callers check cache first).
+# Params: Node, letters on path to node, dictionary of prefix keys and longest word lengths to add to, levels left to cache.
+# Returns: Length of longest word below node (0 if it has none).
+def _longestBelow(node, prefix: str, longest: dict, depth: int = LONGEST_DEPTH) -> int:
+    if depth == 0:
+        length = _deepestWord(node, len(prefix))
+    else:
+        length = len(prefix) if node.isWord else 0
+        for ch, child in node.children.items():
+            length = max(length, _longestBelow(child, prefix + ch, longest, depth - 1))
+    longest[prefix] = length
+    return length
+
+
+
+# Purpose: Helper function for _longestBelow() to find length of longest word below a node, one level at a time.
+# Params: Node, length of word on path to node.
+# Returns: Length of longest word below node (0 if it has none).
+def _deepestWord(node, length: int) -> int:
+    deepest = length if node.isWord else 0
+    level = [node]
+    while level:
+        level = [child for curr in level for child in curr.children.values()] # Whole level built in one comprehension
+        length += 1
+        if any(child.isWord for child in level):
+            deepest = length
+    return deepest
+
+
+
+# Purpose: Helper function for _highestScoring() to bound score of words up to a length.
+# Params: Length of longest word, if a pangram bonus is possible.
+# Returns: Most points any word that long or shorter could earn (same rules as wordPoints()).
+def _scoreBound(length: int, bonus: bool) -> int:
+    points = 1 if length == 4 else length if length > 4 else 0
+    return points + 7 if bonus else points
+
+
+
+# Purpose: Find words matching a wildcard pattern.
+# Params: Trie or SBTrie, pattern where "?" matches one letter and "*" matches any run of letters (including none).
+# Returns: Sorted list of matching words.
+def match(trie, pattern: str) -> list[str]:
+    pattern = pattern.lower()
+    end = len(pattern)
+    found = []
+
+    # States are a node and position in pattern, and each node is reached by only one path,
+    # so a visited state never needs walking again (keeps patterns with many stars from blowing up)
+    stack = [(trie.root, 0, "")]
+    visited = set()
+    while stack:
+        curr, pos, word = stack.pop()
+        if (id(curr), pos) in visited:
+            continue
+        visited.add((id(curr), pos))
+
+        if pos == end:
+            if curr.isWord:
+                found.append(word)
+            continue
+        token = pattern[pos]
+        if token == "*":
+            stack.append((curr, pos + 1, word)) # Star matches nothing
+            for ch, child in curr.children.items():
+                stack.append((child, pos, word + ch)) # Star matches one more letter
+        elif token == "?":
+            for ch, child in curr.children.items():
+                stack.append((child, pos + 1, word + ch))
+        else:
+            child = curr.children.get(token)
+            if child is not None:
+                stack.append((child, pos + 1, word + token))
+
+    found = set(found) # Different states can end on same word
+    if getattr(trie, "base", None) is not None:
+        fixed = re.match(r"[^?*]*", pattern).group() # Base words are searched from longest fixed prefix
+        regex = re.compile("".join("." if ch == "?" else ".*" if ch == "*" else re.escape(ch) for ch in pattern) + r"\Z",
+                           re.DOTALL)
+        found.update(word for word in _baseWords(trie, fixed) if regex.match(word))
+    return sorted(found)
+
+
+
+# Purpose: Find words that can be spelled from a multiset of letters.
+# Params: Trie or SBTrie, letters available (repeated letters can be used as many times as they repeat,
+# "?" is a blank that can stand for any letter), if every letter must be used, shortest word length wanted.
+# Returns: Sorted list of words that can be spelled.
+def fromLetters(trie, letters: str, exact: bool = False, minLength: int = 1) -> list[str]:
+    counts = Counter(letters.lower())
+    blanks = counts.pop("?", 0)
+    total = sum(counts.values()) + blanks
+    found = []
+
+    # Depth first with a stack of child iterators, taking a letter (or blank) on the way down
+    # and giving it back once that child's subtree is done
+    stack = [iter(trie.root.children.items())]
+    word = []
+    used = [] # Letter taken for each letter of word ("?" where a blank was used)
+    while stack:
+        for ch, child in stack[-1]:
+            if counts.get(ch, 0) > 0:
+                counts[ch] -= 1
+                used.append(ch)
+            elif blanks > 0:
+                blanks -= 1
+                used.append("?")
+            else:
+                continue # Letter not available, so none of child's words can be spelled
+
+            word.append(ch)
+            if child.isWord and len(word) >= minLength and (not exact or len(word) == total):
+                found.append("".join(word))
+            stack.append(iter(child.children.items()) if len(word) < total else iter(())) # Stop when every letter is used
+            break
+        else:
+            stack.pop()
+            if used:
+                word.pop()
+                ch = used.pop()
+                if ch == "?":
+                    blanks += 1
+                else:
+                    counts[ch] += 1
+
+    base = getattr(trie, "base", None)
+    if base is not None:
+        if isinstance(base, ShardedDictionary):
+            # Every word starts with a letter in rack (any letter with a blank), so other shards are never mapped
+            firstLetters = sorted(base.shards) if blanks else sorted(ch for ch in counts if ch in base.shards)
+            dictionaries = (base.shard(letter) for letter in firstLetters)
+        else:
+            dictionaries = [base]
+        for dictionary in dictionaries:
+            found.extend(word for word in _baseFromLetters(dictionary, counts, blanks, exact, total, minLength)
+                         if word not in trie.baseRemoved)
+    return sorted(found)
+
+
+
+# Purpose: Helper function for fromLetters() to find words of a compiled dictionary that can be spelled from letters,
+# walking its sorted words as a trie where each node is the range of words starting with the letters on its path.
+# Params: MappedDictionary, Counter of available letters, number of blanks, if every letter must be used,
+# number of letters and blanks, shortest word length wanted.
+# Returns: Generator of words that can be spelled, in sorted order.
+def _baseFromLetters(dictionary, counts: Counter, blanks: int, exact: bool, total: int, minLength: int):
+    # Same walk as for trie in fromLetters(), with ranges of words in place of nodes
+    stack = [_rangeChildren(dictionary, "", 0, dictionary.count, counts, blanks)]
+    word = []
+    used = []
+    while stack:
+        for ch, low, high in stack[-1]:
+            if counts.get(ch, 0) > 0:
+                counts[ch] -= 1
+                used.append(ch)
+            elif blanks > 0:
+                blanks -= 1
+                used.append("?")
+            else:
+                continue
+
+            word.append(ch)
+            prefix = "".join(word)
+            if len(word) >= minLength and (not exact or len(word) == total) and \
+               dictionary.wordBytes(low) == prefix.encode("utf-8"): # Prefix is a word if it sorts first in its range
+                yield prefix
+            stack.append(_rangeChildren(dictionary, prefix, low, high, counts, blanks) if len(word) < total else iter(()))
+            break
+        else:
+            stack.pop()
+            if used:
+                word.pop()
+                ch = used.pop()
+                if ch == "?":
+                    blanks += 1
+                else:
+                    counts[ch] += 1
+
+
+
+# Purpose: Helper function for _baseFromLetters() to yield next letters after a prefix, with each one's range of words.
+# Params: MappedDictionary, prefix, range of indexes of words starting with prefix, Counter of available letters, number of blanks.
+# Returns: Generator of (letter, first index, end index) tuples in letter order, only for letters still available
+# (every next letter in range with a blank left).
+def _rangeChildren(dictionary, prefix: str, low: int, high: int, counts: Counter, blanks: int):
+    if low < high and dictionary.wordBytes(low) == prefix.encode("utf-8"):
+        low += 1 # Prefix itself has no next letter
+    if blanks:
+        # Each next letter's range is skipped in one search, so this costs one search per child, not per word
+        while low < high:
+            ch = dictionary.word(low)[len(prefix)]
+            childLow, childHigh = dictionary.prefixRange(prefix + ch, low, high)
+            yield ch, childLow, childHigh
+            low = childHigh
+    else:
+        for ch in sorted(ch for ch, count in counts.items() if count > 0):
+            childLow, childHigh = dictionary.prefixRange(prefix + ch, low, high)
+            if childLow < childHigh:
+                yield ch, childLow, childHigh
+
+
+
+# Purpose: Main function for query engine.
+# Params: None, reads command line arguments.
+# Returns: None (prints matching words, then count and query time).
+def main():
+    parser = argparse.ArgumentParser(description="Query a dictionary by prefix, pattern, or letters")
+    parser.add_argument("filename")
+    parser.add_argument("query", choices=["complete", "match", "letters"])
+    parser.add_argument("text", help="prefix, pattern (? and *), or letters (? for blank)")
+    parser.add_argument("-k", type=int, default=10, help="words wanted (complete)")
+    parser.add_argument("--by", choices=["length", "score"], default="length", help="ordering (complete)")
+    parser.add_argument("--letters", help="letters words may use (complete)")
+    parser.add_argument("--exact", action="store_true", help="use every letter (letters)")
+    args = parser.parse_args()
+
+    trie = SBTrie()
+    if not trie.getFromFile(args.filename):
+        raise SystemExit(f"could not read {args.filename}")
+
+    start = time.perf_counter()
+    if args.query == "complete":
+        words = complete(trie, args.text, args.k, args.by, args.letters)
+    elif args.query == "match":
+        words = match(trie, args.text)
+    else:
+        words = fromLetters(trie, args.text, args.exact)
+    elapsed = time.perf_counter() - start
+
+    for word in words:
+        print(word)
+    print(f"{len(words)} words in {elapsed * 1e3:.2f} ms")
+
+
+
+if __name__ == "__main__":
+    main()
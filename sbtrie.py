@@ -1,145 +1,677 @@
-# -*- coding: utf-8 -*-
-"""
-SBTrie inherits from Trie class and adds functionality for the 
-New York Times' Spelling Bee game. It contains additional functions
-for implementing rules and functionalities for the game, such as
-retrieving letters to be used, point system, checking if words are
-pangrams, and if user got a bingo. Additional data members for the
-central letter, other six letters, a trie for discovered words by user,
-and if pangrams and bingos were found.
-"""
-
-from trie import Trie
-
-class SBTrie(Trie):
-    """ A class for the Spelling Bee Trie """
-    def __init__ (self):
-        super().__init__()
-        self.centralLetter = "" # Central letter (required letter for all new words)
-        self.otherLetters = "" # Other six letters that can be used in all new words
-        self.discoveredWords = Trie() # Trie that stores words found by user
-        self.score = 0 # Total score based on all new words found
-        self.pangramFound = False # If pangram discovered (new word contains all seven letters)
-        self.bingoFound = False # If bingo achieved (every letter has a word found by user)
-    
-
-
-    # Purpose: Insert found word into trie of discovered words.
-    # Params: Word that was discovered by user.
-    # Returns: None (inserts found word into trie of discovered words).
-    def addFoundWord(self, word: str):
-        self.discoveredWords.insert(word)
-
-
-
-    # Purpose: Return a string of seven characters where first character is central letter
-    # and next six are other letters in alphabetical order.
-    # Params: None
-    # Returns: String of all seven letters.
-    def getLetters (self) -> str:
-        others = "".join(sorted(self.otherLetters)) # Convert letters into list, sort alphabetically, then join together into string
-        return self.centralLetter + others # Returns string with central letter concatenated to front
-
-
-
-    # Purpose: Point system function for determining how many points user gets from potential word.
-    # Params: Word that user is adding.
-    # Returns: Number of points earned from word (negatives indicate error in word).
-    def isNewSBWord (self, word: str) -> int:
-        points = 0
-
-        if len(word) < 4:
-            return -1 # Word is too short (length must be at least four)
-    
-        if self.centralLetter not in word:
-            return -2 # Word is missing central letter (must contain it)
-        
-        for ch in word:
-            if ch not in self.getLetters():
-                return -3 # Word contains at least one invalid letter (not one of the seven letters)
-            
-        if not self.search(word):
-            return -4 # Word is not in dictionary (invalid word)
-        
-        if self.discoveredWords.search(word):
-            return -5 # Word already found by user
-        
-        if len(word) == 4:
-            points = 1 # User earns one point for a four letter word
-        elif len(word) > 4:
-            points = len(word) # User earns points equivalent to length of word for any word more than four letters
-        
-        if self.isPangram(word):
-            points += 7 # User earns seven additional points if word is pangram (contains all seven letters)
-
-        return points
-
-
-
-    # Purpose: Determines if word contains all seven current letters and no invalid letters.
-    # Params: Word that user is adding.
-    # Returns: True if word contains all seven current letters and no invalid letters, false if not.
-    def isPangram (self, word: str) -> bool:
-        letters = self.getLetters()
-
-        # If any letter in word is not one of seven valid letters return false
-        for ch in word:
-            if ch not in letters:
-                return False
-        
-        # If at least one of seven valid letters is not present in word return false
-        for ch in letters:
-            if ch not in word:
-                return False
-        
-        return True
-    
-
-
-    # Purpose: Determines if user has achieved a bingo (at least one word has been found for each of the seven letters)
-    # Params: None.
-    # Returns: True if at least one word has been found for each of the seven letters, false if not.
-    def hasBingo (self) -> bool:
-        letters = self.getLetters()
-        rootChildren = self.discoveredWords.root.children # Root node's children contains first letters of all found words
-
-        # Check root node's children if user found at least one word for all seven letters 
-        for ch in letters:
-            if ch not in rootChildren:
-                return False # Return false if at least one of seven valid letters is not present
-        
-        return True
-
-
-
-    # Purpose: Returns a list of all words that have been found.
-    # Params: None.
-    # Returns: List of all words that have been found.
-    def getFoundWords (self) -> list[str]:
-        return self.discoveredWords.words() # Call words() function from Trie superclass to do all the work
-
-
-
-    # Purpose: Build a list of strings containing all words in trie that meet criteria of Spelling Bee game.
-    # Params: String for central letter, string for other six letters.
-    # Returns: List of strings containing all words in trie that are at least four letters long, 
-    # contains central letter, and does not contain letters outside of the seven valid letters.
-    def sbWords(self, centralLetter: str, otherLetters: str) -> list[str]:
-        foundWords = []
-        validLetters = self.getLetters();
-        self._sbWords(self.root, "", validLetters, foundWords) # Recursively collect all valid words starting from root
-        return foundWords
-
-
-
-    # Purpose: Recursively traverse trie to collect all words that meet criteria of Spelling Bee game.
-    # Params: Current node, string of word so far after recursive call, string of seven valid letters, list to store all valid words found.
-    # Returns: None (adds words to word list)
-    def _sbWords(self, curr, wordSoFar, letters, wordList):
-        if len(wordSoFar) >= 4 and letters[0] in wordSoFar and curr.isWord:
-            wordList.append(wordSoFar) # If word is at least four letters, contains central word, and is a valid word add to list
-        
-        # Depth-first search for all potential paths
-        for ch in curr.children:
-            if ch in letters: # Only traverse to paths that use one of seven valid letters
-                self._sbWords(curr.children[ch], wordSoFar + ch, letters, wordList) # Add letter to word so far and recursively call function again
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""
+SBTrie inherits from Trie class and adds functionality for the 
+New York Times' Spelling Bee game. It contains additional functions
+for implementing rules and functionalities for the game, such as
+retrieving letters to be used, point system, checking if words are
+pangrams, and if user got a bingo. Additional data members for the
+central letter, other six letters, a bitset of words discovered by user
+(see foundwords.py), and if pangrams and bingos were found. The game functions and data
+members live in SBSession, which SBTrie also inherits from, so a server
+can give each player a small SBSession sharing one SBTrie dictionary.
+Words are also indexed by the set of letters they use (as a bitmask),
+so all valid words for a puzzle can be found by looking up the subsets
+of its seven letters instead of searching the whole trie. Words loaded
+from a file are indexed a chunk at a time after they are inserted,
+which costs about a sixth of the load and is paid back by every puzzle
+not searching the trie. A compiled
+dictionary file (or a directory of first-letter shards, see shards.py)
+can also be attached as a read-only base underneath the trie, and is
+searched along with it. Answers for each puzzle are
+cached per dictionary version (see puzzlecache.py), so players sharing
+the same letters don't recompute them.
+"""
+
+from collections import namedtuple
+from heapq import merge
+
+from dictfile import MappedDictionary, isCompiled
+from foundwords import FoundWords
+from puzzlecache import PuzzleAnswers, PuzzleCache
+from shards import MAX_BYTES, ShardedDictionary, isSharded
+from trie import Trie, Node
+
+
+
+class LetterBits(dict):
+    """ A dictionary of letter keys and their mask bits, adding any letter the first time it is looked up """
+    def __missing__(self, ch: str) -> int:
+        if "a" <= ch <= "z":
+            bit = 1 << (ord(ch) - 97)
+        else:
+            bit = 1 << (ord(ch) + 26) # Unique bit past 'z' for any other letter
+        self[ch] = bit
+        return bit
+
+LETTER_BITS = LetterBits() # Shared by every mask built, so each letter's bit is computed once
+
+
+
+# Purpose: Build bitmask of the distinct letters in a word (bit 0 for 'a' through bit 25 for 'z').
+# Params: Word (or string of letters) to build mask from.
+# Returns: Integer bitmask of letters used (non a-z letters map to bits past 'z').
+def letterMask(word: str) -> int:
+    return sum(map(LETTER_BITS.__getitem__, set(word))) # Distinct letters, so adding bits is the same as ORing them
+
+
+
+# Purpose: Add many words to a letter mask index at once.
+# Params: Dictionary of letter mask keys and lists of words, list of words (at least four letters, not in index yet).
+# Returns: None (appends each word to list of its letter mask).
+def indexWords(index: dict, words: list[str]):
+    for word, mask in zip(words, map(letterMask, words)):
+        bucket = index.get(mask)
+        if bucket is None:
+            index[mask] = [word]
+        else:
+            bucket.append(word)
+
+
+
+# Purpose: Point system for a valid Spelling Bee word.
+# Params: Word that user is adding, if word is a pangram.
+# Returns: Number of points earned from word.
+def wordPoints(word: str, pangram: bool) -> int:
+    points = 0
+    if len(word) == 4:
+        points = 1 # User earns one point for a four letter word
+    elif len(word) > 4:
+        points = len(word) # User earns points equivalent to length of word for any word more than four letters
+    
+    if pangram:
+        points += 7 # User earns seven additional points if word is pangram (contains all seven letters)
+    return points
+
+
+
+# Results of checking a batch of guesses as parallel lists: the guesses, 0 if valid or error code -1 to -5
+# (see isNewSBWord()), points earned (0 if invalid), and if each guess is a pangram
+GuessResults = namedtuple("GuessResults", ["words", "codes", "points", "pangrams"])
+
+BATCH_SIZE = 65536 # Guesses checked together in one pass
+
+# Hint counts for a puzzle's answers: dictionary of (first letter, length) keys and answer counts, dictionary of
+# two letter prefix keys and answer counts, number of pangrams, and number of perfect pangrams
+Hints = namedtuple("Hints", ["lengthCounts", "prefixCounts", "pangrams", "perfectPangrams"])
+
+
+
+# Rank names and minimum percentage of maximum score needed for each, lowest first
+RANKS = [("Beginner", 0), ("Good Start", 2), ("Moving Up", 5), ("Good", 8), ("Solid", 15),
+         ("Nice", 25), ("Great", 40), ("Amazing", 50), ("Genius", 70), ("Queen Bee", 100)]
+
+
+
+class SBSession:
+    """ A class for one player's Spelling Bee game """
+    __slots__ = ("dictionary", "centralLetter", "otherLetters", "discoveredWords", "score", "pangramFound",
+                 "bingoFound", "puzzleKey", "puzzle", "letterSet", "journal", "journalId") # No per-session dictionary
+
+    def __init__ (self, dictionary):
+        self.dictionary = dictionary # Dictionary (SBTrie) used to check words, can be shared by many sessions
+        self.centralLetter = "" # Central letter (required letter for all new words)
+        self.otherLetters = "" # Other six letters that can be used in all new words
+        self.discoveredWords = FoundWords() # Bitset of words found by user over puzzle's shared answer list
+        self.score = 0 # Total score based on all new words found
+        self.pangramFound = False # If pangram discovered (new word contains all seven letters)
+        self.bingoFound = False # If bingo achieved (every letter has a word found by user)
+        self.puzzleKey = None # Letters and dictionary version that precomputed puzzle state belongs to
+        self.puzzle = None # Precomputed PuzzleAnswers for current letters
+        self.letterSet = frozenset() # Set of all seven valid letters (shared with puzzle's PuzzleAnswers)
+        self.journal = None # SessionJournal recording new letters and found words (see journal.py)
+        self.journalId = None # Id of session in journal
+    
+
+
+    # Purpose: Start a new game with new letters, precomputing puzzle's answers and points.
+    # Params: String for central letter, string for other six letters.
+    # Returns: None (initializes letters and resets found words, score, pangram, and bingo).
+    def setLetters(self, centralLetter: str, otherLetters: str):
+        self.centralLetter = centralLetter
+        self.otherLetters = otherLetters
+        self.discoveredWords.clear()
+        self.pangramFound = False
+        self.bingoFound = False
+        self.score = 0
+        self.puzzleKey = None # Recomputed even when letters are the same as before
+        self.currentAnswers() # Precompute so first guess is a single lookup
+        if self.journal is not None:
+            self.journal.recordLetters(self)
+
+
+
+    # Purpose: Switch game to another dictionary, such as a newer snapshot (see snapshot.py).
+    # Params: Dictionary (SBTrie) used to check words from now on.
+    # Returns: None (answers for current letters are recomputed from new dictionary on next use).
+    def setDictionary(self, dictionary):
+        self.dictionary = dictionary
+        self.puzzleKey = None # Versions of different dictionaries can't be compared
+
+
+
+    # Purpose: Add found word to discovered words.
+    # Params: Word that was discovered by user.
+    # Returns: None (sets found word's bit, or keeps it on the side if it isn't an answer).
+    def addFoundWord(self, word: str):
+        self.currentAnswers() # Found word's bit is over current answer list
+        self.discoveredWords.insert(word)
+
+
+
+    # Purpose: Retrieve hint counts for current letters.
+    # Params: If only answers not found yet are counted (all answers if false).
+    # Returns: Hints for current letters (counts of zero are kept, so grid shape doesn't change as words are found).
+    def hints(self, remaining: bool = True) -> Hints:
+        puzzle = self.currentAnswers()
+        if remaining:
+            # Found answers are subtracted from puzzle's shared counts on each call, so sessions keep no counts of their own
+            lengthCounts = dict(puzzle.lengthCounts)
+            prefixCounts = dict(puzzle.prefixCounts)
+            pangrams = len(puzzle.pangrams)
+            perfectPangrams = len(puzzle.perfectPangrams)
+            for word in self.discoveredWords.iterWords():
+                if word not in puzzle.points:
+                    continue # Kept on the side, not an answer of current list
+                lengthCounts[(word[0], len(word))] -= 1
+                prefixCounts[word[:2]] -= 1
+                if word in puzzle.pangrams:
+                    pangrams -= 1
+                    perfectPangrams -= word in puzzle.perfectPangrams
+            return Hints(lengthCounts, prefixCounts, pangrams, perfectPangrams)
+        return Hints(puzzle.lengthCounts, puzzle.prefixCounts, len(puzzle.pangrams), len(puzzle.perfectPangrams))
+
+
+
+    # Purpose: Return a string of seven characters where first character is central letter
+    # and next six are other letters in alphabetical order.
+    # Params: None
+    # Returns: String of all seven letters.
+    def getLetters (self) -> str:
+        others = "".join(sorted(self.otherLetters)) # Convert letters into list, sort alphabetically, then join together into string
+        return self.centralLetter + others # Returns string with central letter concatenated to front
+
+
+
+    # Purpose: Point system function for determining how many points user gets from potential word.
+    # Params: Word that user is adding.
+    # Returns: Number of points earned from word (negatives indicate error in word).
+    def isNewSBWord (self, word: str) -> int:
+        if len(word) < 4:
+            return -1 # Word is too short (length must be at least four)
+    
+        if self.centralLetter not in word:
+            return -2 # Word is missing central letter (must contain it)
+        
+        puzzle = self.currentAnswers()
+        if not self.letterSet.issuperset(word):
+            return -3 # Word contains at least one invalid letter (not one of the seven letters)
+            
+        points = puzzle.points.get(word) # Precomputed answers are exactly the dictionary words passing checks above
+        if points is None:
+            return -4 # Word is not in dictionary (invalid word)
+        
+        if self.discoveredWords.search(word):
+            return -5 # Word already found by user
+        
+        return points
+
+
+
+    # Purpose: Add a valid word to found words and update score, pangram, and bingo (word must have
+    # been checked with isNewSBWord() first).
+    # Params: Word that was discovered by user, points earned from word.
+    # Returns: Tuple of if word is a pangram and if word scored a bingo.
+    def recordWord(self, word: str, points: int) -> tuple:
+        self.addFoundWord(word)
+        self.score += points
+
+        pangram = word in self.currentAnswers().pangrams
+        if pangram:
+            self.pangramFound = True
+
+        bingo = self.hasBingo() and self.discoveredWords.count == 7 # Bingo scored when seventh word completes it
+        if bingo:
+            self.bingoFound = True
+
+        if self.journal is not None:
+            self.journal.recordWord(self, word, points, pangram, bingo)
+        return pangram, bingo
+
+
+
+    # Purpose: Check many guesses at once without printing, giving same results as isNewSBWord().
+    # Params: Iterable of guesses (an open file works, one guess per line, with only line endings removed so
+    # other whitespace is checked like any other character), if valid guesses should be recorded as found
+    # (so later repeats in batch are reported as already found).
+    # Returns: GuessResults with one entry per guess in each list, in same order as guesses.
+    def checkWords(self, guesses, record: bool = False) -> GuessResults:
+        results = GuessResults([], [], [], []) # Lists of plain values, so millions of results don't create millions of objects
+        batch = []
+        for guess in guesses:
+            batch.append(guess.rstrip("\n")) # Same guess isNewSBWord() would get, minus file line ending
+            if len(batch) == BATCH_SIZE:
+                self._checkBatch(batch, record, results)
+                batch = []
+        if batch:
+            self._checkBatch(batch, record, results)
+        return results
+
+
+
+    # Purpose: Helper function for checkWords() to check one batch of guesses.
+    # Params: List of guesses, if valid guesses should be recorded, GuessResults to add results to.
+    # Returns: None (adds results for each guess).
+    def _checkBatch(self, words: list[str], record: bool, results: GuessResults):
+        codes = self._letterCodes(words)
+        points = [0] * len(words)
+        pangrams = [False] * len(words)
+        puzzle = self.currentAnswers()
+
+        # Only words passing letter checks need dictionary and found word lookups
+        for ind, code in enumerate(codes):
+            if code != 0:
+                continue
+            word = words[ind]
+            wordPoints = puzzle.points.get(word)
+            if wordPoints is None:
+                codes[ind] = -4 # Word is not in dictionary
+            elif self.discoveredWords.search(word):
+                codes[ind] = -5 # Word already found by user
+            else:
+                points[ind] = wordPoints
+                pangrams[ind] = word in puzzle.pangrams
+                if record:
+                    self.recordWord(word, wordPoints)
+
+        results.words.extend(words)
+        results.codes.extend(codes)
+        results.points.extend(points)
+        results.pangrams.extend(pangrams)
+
+
+
+    # Purpose: Run length, central letter, and letter checks of isNewSBWord() on a batch of words.
+    # Params: List of words.
+    # Returns: List of codes, 0 if word passes or error code -1 to -3.
+    def _letterCodes(self, words: list[str]) -> list[int]:
+        self.currentAnswers()
+        centralLetter = self.centralLetter
+        isValid = self.letterSet.issuperset # Looked up once for whole batch
+        return [-1 if len(word) < 4 else -2 if centralLetter not in word else 0 if isValid(word) else -3
+                for word in words]
+
+
+
+    # Purpose: Determines if word contains all seven current letters and no invalid letters.
+    # Params: Word that user is adding.
+    # Returns: True if word contains all seven current letters and no invalid letters, false if not.
+    def isPangram (self, word: str) -> bool:
+        self.currentAnswers()
+        return self.letterSet == set(word) # Same letters as puzzle, so no invalid letters and none missing
+    
+
+
+    # Purpose: Determines if user has achieved a bingo (at least one word has been found for each of the seven letters)
+    # Params: None.
+    # Returns: True if at least one word has been found for each of the seven letters, false if not.
+    def hasBingo (self) -> bool:
+        puzzle = self.currentAnswers()
+        return self.discoveredWords.coversLetters(self.letterSet, puzzle.letterMasks) # One AND per letter
+
+
+
+    # Purpose: Returns a list of all words that have been found.
+    # Params: None.
+    # Returns: List of all words that have been found.
+    def getFoundWords (self) -> list[str]:
+        return self.discoveredWords.words() # Bits are in answer order, so words come out sorted
+
+
+
+    # Purpose: Lazily yield words that have been found in sorted order.
+    # Params: None.
+    # Returns: Generator of found words.
+    def iterFoundWords(self):
+        return self.discoveredWords.iterWords()
+
+
+
+    # Purpose: Suggest answers close to a guess that isn't in dictionary.
+    # Params: Guess, largest edit distance (insertions, deletions, and substitutions), most suggestions wanted.
+    # Returns: List of answers not found yet within edit distance of guess, closest first.
+    def suggestWords(self, word: str, maxDistance: int = 2, limit: int = 5) -> list[str]:
+        puzzle = self.currentAnswers()
+        suggestions = []
+        for answer, distance in puzzle.answerTrie.similarWords(word, maxDistance):
+            if not self.discoveredWords.search(answer):
+                suggestions.append(answer)
+                if len(suggestions) == limit:
+                    break
+        return suggestions
+
+
+
+    # Purpose: Calculate percentage of puzzle's maximum score earned so far.
+    # Params: None.
+    # Returns: Whole number percentage of maximum score (0 if puzzle has no answers).
+    def progress(self) -> int:
+        maxScore = self.currentAnswers().maxScore
+        if maxScore == 0:
+            return 0
+        return self.score * 100 // maxScore
+
+
+
+    # Purpose: Find player's rank from their progress.
+    # Params: None.
+    # Returns: Name of highest rank reached.
+    def rank(self) -> str:
+        progress = self.progress()
+        name = RANKS[0][0]
+        for rankName, minimum in RANKS:
+            if progress >= minimum:
+                name = rankName
+        return name
+
+
+
+    # Purpose: Build a list of all words in dictionary that meet criteria of Spelling Bee game.
+    # Params: String for central letter, string for other six letters.
+    # Returns: Sorted list of valid words (see SBTrie.sbWords()).
+    def sbWords(self, centralLetter: str, otherLetters: str) -> list[str]:
+        return self.dictionary.sbWords(centralLetter, otherLetters)
+
+
+
+    # Purpose: Retrieve precomputed answers for current letters, recomputing them if letters or dictionary changed.
+    # Params: None.
+    # Returns: PuzzleAnswers for current letters (see SBTrie.puzzleAnswers()).
+    def currentAnswers(self) -> PuzzleAnswers:
+        key = (self.centralLetter, self.otherLetters, self.dictionary.version)
+        if key != self.puzzleKey:
+            self.puzzle = self.dictionary.puzzleAnswers(self.centralLetter, self.otherLetters)
+            self.letterSet = self.puzzle.letterSet
+            self.discoveredWords.rebase(self.puzzle.answers, self.puzzle.positions) # Found words move to new answer list
+            self.puzzleKey = key
+        return self.puzzle
+
+
+
+class SBTrie(Trie, SBSession):
+    """ A class for the Spelling Bee Trie """
+    def __init__ (self, nodeType = Node):
+        Trie.__init__(self, nodeType)
+        SBSession.__init__(self, self) # Trie is its own dictionary for the single player game
+        self.answerIndex = {} # Dictionary of letter mask keys and lists of words (at least four letters) using exactly those letters
+        self.base = None # Read-only compiled dictionary (MappedDictionary or ShardedDictionary) holding words not stored in trie
+        self.maxShardBytes = MAX_BYTES # Most bytes of a sharded base dictionary kept mapped at once
+        self.baseRemoved = set() # Words removed from base dictionary (base itself can't be changed)
+        self.puzzleCache = PuzzleCache() # Answers for recently played letters, keyed by version
+    
+
+
+    # Purpose: Retrieve all words from a file (plain word list, compiled dictionary, or sharded dictionary directory) and insert them.
+    # Params: Name of file (or shard directory) to retrieve from, optional function called with load statistics.
+    # Returns: True if operation is successful, false if not.
+    def getFromFile(self, filename: str, progress = None) -> bool:
+        if isCompiled(filename) or isSharded(filename):
+            return self.getFromCompiledFile(filename, progress)
+        return super().getFromFile(filename, progress)
+
+
+
+    # Purpose: Load words from a compiled dictionary file or sharded dictionary directory. An empty trie
+    # memory-maps the file (or shards, as they are needed) as its base dictionary without inserting anything,
+    # otherwise the file's words are inserted into trie.
+    # Params: Name of compiled file or shard directory to load, optional function called with load statistics.
+    # Returns: True if operation is successful, false if not.
+    def getFromCompiledFile(self, filename: str, progress = None) -> bool:
+        try:
+            if isSharded(filename):
+                dictionary = ShardedDictionary(filename, self.maxShardBytes) # Only reads manifest
+            else:
+                dictionary = MappedDictionary(filename)
+        except (OSError, ValueError):
+            return False # File missing or not a valid compiled dictionary
+        
+        self.loadStats = {"characters": 0, "accepted": 0, "rejected": 0, "duplicates": 0}
+        if self.count == 0:
+            self.base = dictionary # Lookups answered straight from mapped file
+            self.baseRemoved = set()
+            self.count = dictionary.wordCount()
+            self.version += 1
+            self.loadStats["accepted"] = self.count
+        else:
+            for word in dictionary.words():
+                if self.insert(word):
+                    self.loadStats["accepted"] += 1
+                else:
+                    self.loadStats["duplicates"] += 1
+        
+        if progress is not None:
+            progress(self.loadStats)
+        return True
+
+
+
+    # Purpose: Check if word is in base dictionary and has not been removed.
+    # Params: String for word being searched.
+    # Returns: True if word is an active base dictionary word.
+    def _inBase(self, word: str) -> bool:
+        if self.base is None:
+            return False
+        word = word.lower()
+        return word not in self.baseRemoved and self.base.search(word)
+
+
+
+    # Purpose: Helper function for getFromStream() to insert a chunk of words, indexing them all at once afterward.
+    # Params: List of words read from file.
+    # Returns: None (inserts and indexes words and updates loadStats).
+    def _insertTokens(self, tokens: list[str]):
+        if self.base is not None:
+            super()._insertTokens(tokens) # Each word has to be looked up in base dictionary by insert()
+            return
+
+        stats = self.loadStats
+        insert = super().insert # Trie only, index is updated for whole chunk below
+        added = [] # New words long enough to be answers
+        for word in tokens:
+            word = word.lower()
+            if not word.isalpha():
+                stats["rejected"] += 1
+            elif insert(word):
+                stats["accepted"] += 1
+                if len(word) >= 4:
+                    added.append(word)
+            else:
+                stats["duplicates"] += 1
+        indexWords(self.answerIndex, added)
+
+
+
+    # Purpose: Insert new word into trie and index it by its letter mask.
+    # Params: String for word being added.
+    # Returns: True if word successfully inserted, false if not.
+    def insert(self, word: str) -> bool:
+        word = word.lower()
+        if self.base is not None and self.base.search(word):
+            if word not in self.baseRemoved:
+                return False # Fails if word already exists in base dictionary
+            self.baseRemoved.discard(word) # Restore removed base word instead of copying it into trie
+            self.count += 1
+            self.version += 1
+            return True
+        
+        if not super().insert(word):
+            return False
+        
+        if len(word) >= 4:
+            self.answerIndex.setdefault(letterMask(word), []).append(word) # Only words long enough to be answers are indexed
+        return True
+
+
+
+    # Purpose: Remove existing word from trie and from letter mask index.
+    # Params: String for word being removed.
+    # Returns: True if word successfully removed, false if not.
+    def remove(self, word: str) -> bool:
+        word = word.lower()
+        if self._inBase(word):
+            self.baseRemoved.add(word) # Base dictionary is read-only, so hide word instead
+            self.count -= 1
+            self.version += 1
+            return True
+        
+        if not super().remove(word):
+            return False
+        
+        if len(word) >= 4:
+            mask = letterMask(word)
+            bucket = self.answerIndex[mask]
+            bucket.remove(word)
+            if not bucket:
+                del self.answerIndex[mask] # Drop empty lists so index only holds letter sets in use
+        return True
+
+
+
+    # Purpose: Remove many words at once from trie, base dictionary, and letter mask index.
+    # Params: Iterable of words being removed (in any order, duplicates allowed).
+    # Returns: Dictionary of lowercased word keys (in order given) and values of true if word was removed, false if not found.
+    def removeAll(self, words) -> dict:
+        results = dict.fromkeys(word.lower() for word in words)
+        stored = []
+        for word in results:
+            if self._inBase(word):
+                self.baseRemoved.add(word) # Base dictionary is read-only, so hide word instead
+                self.count -= 1
+                self.version += 1
+                results[word] = True
+            else:
+                stored.append(word)
+        results.update(super().removeAll(stored))
+
+        # Each bucket is filtered once, however many of its words were removed
+        removedByMask = {}
+        for word in stored:
+            if results[word] and len(word) >= 4:
+                removedByMask.setdefault(letterMask(word), set()).add(word)
+        for mask, removed in removedByMask.items():
+            bucket = [word for word in self.answerIndex[mask] if word not in removed]
+            if bucket:
+                self.answerIndex[mask] = bucket
+            else:
+                del self.answerIndex[mask] # Drop empty lists so index only holds letter sets in use
+        return results
+
+
+
+    # Purpose: Remove all words from trie and letter mask index.
+    # Params: None.
+    # Returns: True after clearing trie.
+    def clear(self) -> bool:
+        super().clear()
+        self.answerIndex = {}
+        self.base = None
+        self.baseRemoved = set()
+        return True
+
+
+
+    # Purpose: Search for word in trie and base dictionary.
+    # Params: String for word being searched.
+    # Returns: True if word from parameter exists.
+    def search(self, word: str) -> bool:
+        return super().search(word) or self._inBase(word)
+
+
+
+    # Purpose: Builds and returns a list of all words in trie and base dictionary.
+    # Params: None.
+    # Returns: Sorted list of all words.
+    def words(self) -> list[str]:
+        if self.base is None:
+            return super().words()
+        return list(self.iterWords()) # Merges both sorted sources
+
+
+
+    # Purpose: Lazily yield words in trie and base dictionary in sorted order.
+    # Params: Optional prefix, only words starting with it are yielded.
+    # Returns: Generator of words in sorted order.
+    def iterWords(self, prefix: str = ""):
+        if self.base is None:
+            return super().iterWords(prefix)
+        baseWords = (word for word in self.base.iterWords(prefix) if word not in self.baseRemoved)
+        return merge(super().iterWords(prefix), baseWords) # Both already sorted
+
+
+
+    # Purpose: Build a list of strings containing all words in trie that meet criteria of Spelling Bee game.
+    # Params: String for central letter, string for other six letters.
+    # Returns: Sorted list of strings containing all words in trie that are at least four letters long, 
+    # contains central letter, and does not contain letters outside of the seven valid letters.
+    def sbWords(self, centralLetter: str, otherLetters: str) -> list[str]:
+        if not centralLetter:
+            return [] # No puzzle letters set
+        
+        centralBit = letterMask(centralLetter)
+        otherMask = letterMask(otherLetters) & ~centralBit
+        foundWords = []
+
+        # Every valid word's letter mask is the central letter plus a subset of the other letters,
+        # so walk all subsets of the other letters (64 for six letters) and collect their words
+        subset = otherMask
+        while True:
+            words = self.answerIndex.get(subset | centralBit)
+            if words:
+                foundWords.extend(words)
+            if subset == 0:
+                break
+            subset = (subset - 1) & otherMask # Next smaller subset of other letters
+        
+        if self.base is not None:
+            foundWords.extend(word for word in self.base.sbWords(centralLetter, otherLetters) if word not in self.baseRemoved)
+        return sorted(foundWords)
+
+
+
+    # Purpose: Retrieve answers for a puzzle from cache, building them if needed.
+    # Params: String for central letter, string for other six letters.
+    # Returns: PuzzleAnswers with sorted answers, points per answer, pangrams, maximum score, and hint counts.
+    def puzzleAnswers(self, centralLetter: str, otherLetters: str) -> PuzzleAnswers:
+        return self.puzzleCache.get(self.version, centralLetter, otherLetters,
+                                    lambda: self._buildPuzzleAnswers(centralLetter, otherLetters))
+
+
+
+    # Purpose: Helper function for puzzleAnswers() to compute answers for a puzzle.
+    # Params: String for central letter, string for other six letters.
+    # Returns: PuzzleAnswers for puzzle.
+    def _buildPuzzleAnswers(self, centralLetter: str, otherLetters: str) -> PuzzleAnswers:
+        answers = tuple(self.sbWords(centralLetter, otherLetters))
+        letters = frozenset(centralLetter + otherLetters) # Shared by every player of puzzle
+        pangrams = frozenset(word for word in answers if set(word) == letters) # Uses every letter
+        perfectPangrams = frozenset(word for word in pangrams if len(word) == len(letters)) # Uses every letter once
+        points = {word: wordPoints(word, word in pangrams) for word in answers}
+
+        # Hint counts for all answers are built in one pass
+        firstLetterCounts = {}
+        lengthCounts = {}
+        prefixCounts = {}
+        positions = {}
+        letterMasks = {}
+        for position, word in enumerate(answers):
+            firstLetterCounts[word[0]] = firstLetterCounts.get(word[0], 0) + 1
+            key = (word[0], len(word))
+            lengthCounts[key] = lengthCounts.get(key, 0) + 1
+            prefixCounts[word[:2]] = prefixCounts.get(word[:2], 0) + 1
+            positions[word] = position
+            letterMasks[word[0]] = letterMasks.get(word[0], 0) | 1 << position
+
+        answerTrie = Trie(self.nodeType) # Small enough that searching it for suggestions takes well under a millisecond
+        for word in answers:
+            answerTrie.insert(word)
+        return PuzzleAnswers(answers, points, pangrams, sum(points.values()), firstLetterCounts,
+                             lengthCounts, prefixCounts, perfectPangrams, answerTrie, positions, letterMasks, letters)
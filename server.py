@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+"""
+Spelling Bee game server. The dictionary is loaded once and shared by
+every connection, and each connection only gets its own small SBSession
+(letters, found words, score, pangram and bingo flags). Clients send one
+command per line over TCP or a Unix socket, using the same commands 3-7
+and h as the command-line game, plus 9 to disconnect. Each response is the
+lines the game would print, followed by a line containing only ".".
+Also includes a load generator that plays many sessions at once and
+reports throughput and latency percentiles. Sending the server SIGHUP
+reloads the dictionary file in a background thread and swaps it in
+without pausing lookups; games in progress keep the dictionary they
+started with, and new letter sets (command 3) use the newest one.
+With --journal, players can name their session with "i <name>"; named
+sessions are journaled and a player who sends the same name after a
+restart gets their game back.
+Run as: python server.py serve <filename> [--port N | --unix PATH] [--journal FILE]
+        python server.py load [--port N | --unix PATH] [--clients N] [--guesses N]
+"""
+
+import argparse
+import asyncio
+import random
+import signal
+import time
+
+from journal import SessionJournal
+from sbtrie import SBSession
+from snapshot import DictionaryStore
+from spellingbee import attemptWord, setupLetters, showAllWords, showFoundWords, showHints, showLetters
+
+# Command keys and functions taking session, arguments, and output function (3 is handled by handleClient)
+COMMANDS = {
+    "4": lambda session, args, out: showLetters(session, out),
+    "5": lambda session, args, out: attemptWord(session, args, out),
+    "6": lambda session, args, out: showFoundWords(session, args, out),
+    "7": lambda session, args, out: showAllWords(session, args, out),
+    "h": lambda session, args, out: showHints(session, args, out),
+}
+
+END = "." # Line marking end of a response
+
+
+
+# Purpose: Serve one client connection until it disconnects or quits.
+# Params: Stream reader and writer for connection, store holding shared dictionary snapshot,
+# session journal (None if sessions aren't journaled).
+# Returns: None (writes responses to client).
+async def handleClient(reader, writer, store, journal = None):
+    session = SBSession(store.snapshot()) # Only per-player state is created for each connection
+
+    try:
+        while True:
+            try:
+                line = (await reader.readline()).decode("utf-8", "replace")
+            except (ValueError, asyncio.LimitOverrunError): # Line longer than stream's buffer limit
+                writer.write(f"line too long\n{END}\n".encode("utf-8"))
+                await writer.drain()
+                break # Rest of line can't be told apart from next command, so connection is dropped
+            if not line:
+                break # Client disconnected
+            line = line.strip()
+            command = line[:1]
+            if command in ("9", "q"):
+                break
+
+            lines = []
+            if command == "3":
+                # New game starts on newest dictionary, but an invalid letter set keeps current game on its own
+                previous = session.dictionary
+                session.setDictionary(store.snapshot())
+                setupLetters(session, line[1:].strip(), lines.append)
+                if lines:
+                    session.setDictionary(previous)
+            elif command == "i":
+                resumeSession(session, line[1:].strip(), journal, lines.append)
+            elif command in COMMANDS:
+                COMMANDS[command](session, line[1:].strip(), lines.append)
+            else:
+                lines.append("unknown command")
+            lines.append(END)
+            writer.write(("\n".join(lines) + "\n").encode("utf-8"))
+            await writer.drain()
+    except ConnectionError:
+        pass # Client went away mid-response
+    finally:
+        if session.journal is not None:
+            journal.detach(session.journalId)
+        writer.close()
+
+
+
+# Purpose: Name a connection's session so it is journaled, restoring that session's game if it was saved.
+# Params: Connection's session, session name, session journal (None if sessions aren't journaled), output function.
+# Returns: None (attaches session to journal and prints result).
+def resumeSession(session, name: str, journal, out):
+    if journal is None:
+        out("sessions are not saved by this server")
+    elif not name.isalnum() or len(name) > 64:
+        out("session name must be letters and digits")
+    elif session.journal is not None:
+        out(f"already playing as {session.journalId}")
+    elif name in journal.sessions:
+        out(f"session {name} is in use")
+    else:
+        state = journal.savedStates.get(name)
+        journal.attach(name, session, state)
+        if state is None:
+            out(f"new session {name}")
+        else:
+            out(f"resumed {name}: {session.discoveredWords.count} words found, total {session.score} points")
+
+
+
+# Purpose: Reload dictionary file into a new snapshot without blocking clients.
+# Params: Store holding dictionary snapshot, name of dictionary file.
+# Returns: None (prints result, current snapshot is kept if file can't be read).
+async def reload(store, filename: str):
+    start = time.perf_counter()
+    loaded = await asyncio.get_running_loop().run_in_executor(None, store.reload, filename) # Built in a worker thread
+    if loaded:
+        print(f"{store.snapshot().wordCount()} words reloaded from {filename} in {time.perf_counter() - start:.2f} s")
+    else:
+        print(f"could not read {filename}, keeping current dictionary")
+
+
+
+# Purpose: Sync journal records periodically, so records written in a quiet moment don't wait for next batch.
+# Params: Session journal.
+# Returns: None (runs until cancelled).
+async def syncJournal(journal):
+    while True:
+        await asyncio.sleep(journal.syncInterval)
+        if journal.unsynced:
+            journal.sync()
+
+
+
+# Purpose: Load dictionary and serve clients forever.
+# Params: Name of dictionary file, host and port (or Unix socket path) to listen on, session journal file (None for no journal).
+# Returns: None (runs until interrupted, reloading dictionary on SIGHUP).
+async def serve(filename: str, host: str, port: int, unixPath: str = None, journalFile: str = None):
+    store = DictionaryStore()
+    if not store.reload(filename):
+        raise SystemExit(f"could not read {filename}")
+
+    journal = None
+    if journalFile:
+        journal = SessionJournal(journalFile)
+        start = time.perf_counter()
+        states = journal.recover() # Saved sessions are restored when their players come back
+        print(f"{len(states)} sessions recovered from {journalFile} in {time.perf_counter() - start:.2f} s")
+        syncer = asyncio.ensure_future(syncJournal(journal))
+
+    reloads = set() # Running reload tasks (event loop only keeps weak references)
+    def startReload():
+        task = asyncio.ensure_future(reload(store, filename))
+        reloads.add(task)
+        task.add_done_callback(reloads.discard)
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, startReload)
+    except (AttributeError, NotImplementedError):
+        pass # No SIGHUP on this platform
+
+    handler = lambda reader, writer: handleClient(reader, writer, store, journal)
+    if unixPath:
+        server = await asyncio.start_unix_server(handler, unixPath)
+    else:
+        server = await asyncio.start_server(handler, host, port, backlog=4096)
+    print(f"{store.snapshot().wordCount()} words loaded, listening on {unixPath or f'{host}:{port}'}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if journal is not None:
+            syncer.cancel()
+            journal.close()
+
+
+
+# Purpose: Send one command and read its response.
+# Params: Stream reader and writer for connection, command line to send.
+# Returns: List of response lines (without end marker).
+async def request(reader, writer, line: str) -> list[str]:
+    writer.write((line + "\n").encode("utf-8"))
+    await writer.drain()
+    lines = []
+    while True:
+        response = (await reader.readline()).decode("utf-8").rstrip("\n")
+        if response == END:
+            return lines
+        lines.append(response)
+
+
+
+# Purpose: Play one simulated session, timing every guess.
+# Params: Host, port, Unix socket path, seven puzzle letters, number of guesses, random generator, list to add latencies to.
+# Returns: None (adds latencies in seconds to list).
+async def playSession(host, port, unixPath, letters, guesses, rng, latencies):
+    if unixPath:
+        reader, writer = await asyncio.open_unix_connection(unixPath)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+
+    await request(reader, writer, f"3 {letters}")
+    answers = [line.split()[0] for line in await request(reader, writer, "7") if line != "Bingo found"]
+    for _ in range(guesses):
+        # Mix of real answers (some repeated) and made-up words that fail the dictionary check
+        if answers and rng.random() < 0.7:
+            word = rng.choice(answers)
+        else:
+            word = "".join(rng.choice(letters) for _ in range(rng.randint(4, 8)))
+        start = time.perf_counter()
+        await request(reader, writer, f"5 {word}")
+        latencies.append(time.perf_counter() - start)
+
+    writer.write(b"9\n")
+    await writer.drain()
+    writer.close()
+
+
+
+# Purpose: Run many simulated sessions at once and report throughput and latency.
+# Params: Host, port, Unix socket path, number of concurrent clients, guesses per client, list of puzzles to pick from.
+# Returns: None (prints results).
+async def loadTest(host, port, unixPath, clients: int, guesses: int, puzzles: list[str]):
+    rng = random.Random(42)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(playSession(host, port, unixPath, rng.choice(puzzles), guesses,
+                                       random.Random(rng.random()), latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    print(f"{clients} clients, {len(latencies)} guesses in {elapsed:.2f} s: {len(latencies) / elapsed:.0f} guesses/s")
+    print(f"latency ms: p50 {percentile(0.50):.2f}  p90 {percentile(0.90):.2f}  p99 {percentile(0.99):.2f}  max {latencies[-1] * 1000:.2f}")
+
+
+
+# Purpose: Main function for server and load generator.
+# Params: None, reads command line arguments.
+# Returns: None.
+def main():
+    parser = argparse.ArgumentParser(description="Spelling Bee game server")
+    parser.add_argument("mode", choices=["serve", "load"])
+    parser.add_argument("filename", nargs="?", help="dictionary to serve (serve mode)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7777)
+    parser.add_argument("--unix", help="Unix socket path instead of TCP")
+    parser.add_argument("--journal", help="journal file for saving named sessions (serve mode)")
+    parser.add_argument("--clients", type=int, default=1000, help="concurrent sessions (load mode)")
+    parser.add_argument("--guesses", type=int, default=20, help="guesses per session (load mode)")
+    parser.add_argument("--puzzles", default="aelprtx,eadilmn,oabcdrt", help="comma separated letter sets (load mode)")
+    args = parser.parse_args()
+
+    if args.mode == "serve":
+        if not args.filename:
+            parser.error("serve mode needs a dictionary filename")
+        asyncio.run(serve(args.filename, args.host, args.port, args.unix, args.journal))
+    else:
+        asyncio.run(loadTest(args.host, args.port, args.unix, args.clients, args.guesses, args.puzzles.split(",")))
+
+
+
+if __name__ == "__main__":
+    main()
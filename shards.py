@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+Sharded compiled dictionaries for fast startup. Words are split by first
+letter (the root's children in a Trie) and each shard is written as its
+own compiled dictionary file (see dictfile.py), next to a small JSON
+manifest with every shard's file name, word count, and size. Opening a
+sharded dictionary only reads the manifest, so it takes the same time
+for any dictionary size. A shard is memory-mapped the first time a
+lookup needs it: search() and iterWords() with a prefix only need the
+shard of the first letter, and sbWords() only needs the shards of the
+puzzle's seven letters, since every answer starts with one of them.
+Mapped shards are kept up to a byte limit, past which the least
+recently used shard is dropped (and unmapped as soon as no lookup still
+holds it). A ShardedDictionary can be used wherever a MappedDictionary
+is, such as the read-only base of an SBTrie, so commands 1 and 2 accept
+a shard directory too.
+Run as: python shards.py build <wordfile> <directory>
+        python shards.py time <dictionary> <7letters> [--max-mb N] (times opening dictionary and first guesses)
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import OrderedDict
+from itertools import groupby
+
+from dictfile import MappedDictionary, compileWords
+
+MANIFEST = "shards.json" # Manifest file name inside shard directory
+FORMAT = 1 # Incremented whenever manifest layout changes
+MAX_BYTES = 64 << 20 # Default most bytes of shards kept mapped at once
+
+
+
+# Purpose: Check if a path is a sharded dictionary directory.
+# Params: Path to check.
+# Returns: True if path is a directory with a shard manifest.
+def isSharded(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, MANIFEST))
+
+
+
+# Purpose: Write all words in a trie to a sharded dictionary, one compiled file per first letter.
+# Params: Trie to write (anything with iterWords()), name of directory to write to (created if missing).
+# Returns: Number of words written.
+def compileShards(trie, directory: str) -> int:
+    os.makedirs(directory, exist_ok=True)
+    shards = {}
+    total = 0
+    for letter, group in groupby(trie.iterWords(), key=lambda word: word[0]): # Sorted, so each child of root is one group
+        words = list(group)
+        shardFile = f"{ord(letter):04x}.sbd" # Code point keeps file names plain for any first letter
+        shardPath = os.path.join(directory, shardFile)
+
+        # Shards replace old files instead of overwriting them, since a running game may have them mapped
+        compileWords(words, shardPath + ".tmp")
+        os.replace(shardPath + ".tmp", shardPath)
+        shards[letter] = {"file": shardFile, "count": len(words), "bytes": os.path.getsize(shardPath)}
+        total += len(words)
+
+    # Manifest is written last, so a directory is never a sharded dictionary before all its shards are
+    manifestPath = os.path.join(directory, MANIFEST)
+    with open(manifestPath + ".tmp", "w") as manifestFile:
+        json.dump({"format": FORMAT, "count": total, "shards": shards}, manifestFile, indent=1)
+    os.replace(manifestPath + ".tmp", manifestPath)
+    return total
+
+
+
+class ShardedDictionary:
+    """ A class for a read-only dictionary of first-letter shards, mapped when first needed """
+    def __init__(self, directory: str, maxBytes: int = MAX_BYTES):
+        try:
+            with open(os.path.join(directory, MANIFEST), "r") as manifestFile:
+                manifest = json.load(manifestFile)
+            if manifest["format"] != FORMAT:
+                raise ValueError(f"{directory} has unsupported shard format {manifest['format']}")
+            self.shards = manifest["shards"] # First letter keys and dictionaries of file name, word count, and size
+            self.count = manifest["count"]
+        except (KeyError, TypeError) as error:
+            raise ValueError(f"{directory} has an invalid shard manifest") from error
+        self.directory = directory
+        self.maxBytes = maxBytes # Most bytes of shards kept mapped (the shard in use is always kept)
+        self.loaded = OrderedDict() # First letter keys and MappedDictionary values, least recently used first
+        self.loadedBytes = 0 # Total size of mapped shards
+        self.loads = 0 # Shards mapped (including shards mapped again after eviction)
+        self.evictions = 0 # Shards dropped to stay under byte limit
+
+
+
+    # Purpose: Helper function to retrieve shard for a first letter, mapping it if needed.
+    # Params: First letter.
+    # Returns: MappedDictionary of words starting with letter, None if no word starts with it.
+    def _shard(self, letter: str):
+        shard = self.loaded.get(letter)
+        if shard is not None:
+            self.loaded.move_to_end(letter) # Mark as most recently used
+            return shard
+        info = self.shards.get(letter)
+        if info is None:
+            return None
+
+        shard = MappedDictionary(os.path.join(self.directory, info["file"]))
+        self.loaded[letter] = shard
+        self.loadedBytes += info["bytes"]
+        self.loads += 1
+
+        # Dropped shards are unmapped once nothing refers to them, so a lookup still using one is unaffected
+        while self.loadedBytes > self.maxBytes and len(self.loaded) > 1:
+            oldLetter = self.loaded.popitem(last=False)[0]
+            self.loadedBytes -= self.shards[oldLetter]["bytes"]
+            self.evictions += 1
+        return shard
+
+
+
+    # Purpose: Retrieve dictionary of words starting with a letter, for searches that only need some shards.
+    # Params: First letter.
+    # Returns: MappedDictionary of words starting with letter (mapped if needed), None if no word starts with it.
+    def shard(self, letter: str):
+        return self._shard(letter)
+
+
+
+    # Purpose: Search for word from parameter.
+    # Params: String for word being searched.
+    # Returns: True if word from parameter exists in dictionary.
+    def search(self, word: str) -> bool:
+        word = word.lower()
+        shard = self._shard(word[:1])
+        return shard is not None and shard.search(word)
+
+
+
+    # Purpose: Build a list of all words in dictionary that meet criteria of Spelling Bee game.
+    # Params: String for central letter, string for other six letters.
+    # Returns: Sorted list of words (see MappedDictionary.sbWords()), from shards of the seven letters only.
+    def sbWords(self, centralLetter: str, otherLetters: str) -> list[str]:
+        if not centralLetter:
+            return []
+        foundWords = []
+        for letter in sorted(set(centralLetter + otherLetters)): # Shards in letter order, so words stay sorted
+            shard = self._shard(letter)
+            if shard is not None:
+                foundWords.extend(shard.sbWords(centralLetter, otherLetters))
+        return foundWords
+
+
+
+    # Purpose: Return number of words stored in dictionary.
+    # Params: None.
+    # Returns: Number of words in dictionary (from manifest, without mapping any shard).
+    def wordCount(self) -> int:
+        return self.count
+
+
+
+    # Purpose: Builds and returns a list of all words in dictionary.
+    # Params: None.
+    # Returns: Sorted list of all words.
+    def words(self) -> list[str]:
+        return list(self.iterWords())
+
+
+
+    # Purpose: Lazily yield words in dictionary in sorted order.
+    # Params: Optional prefix, only words starting with it are yielded.
+    # Returns: Generator of words in sorted order.
+    def iterWords(self, prefix: str = ""):
+        prefix = prefix.lower()
+        letters = [prefix[0]] if prefix else sorted(self.shards)
+        for letter in letters:
+            shard = self._shard(letter)
+            if shard is not None:
+                yield from shard.iterWords(prefix)
+
+
+
+    # Purpose: Report shard statistics.
+    # Params: None.
+    # Returns: Dictionary of mapped and total shard counts, mapped and maximum bytes, loads, and evictions.
+    def stats(self) -> dict:
+        return {"loaded": len(self.loaded), "shards": len(self.shards), "loadedBytes": self.loadedBytes,
+                "maxBytes": self.maxBytes, "loads": self.loads, "evictions": self.evictions}
+
+
+
+# Purpose: Main function for sharded dictionaries.
+# Params: None, reads command line arguments.
+# Returns: None (writes shards, or prints time to open a dictionary and check first guesses).
+def main():
+    from sbtrie import SBTrie
+    from trie import Trie
+
+    parser = argparse.ArgumentParser(description="Write or time sharded dictionaries")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="write a sharded dictionary from a word list")
+    build.add_argument("wordfile")
+    build.add_argument("directory")
+    timing = commands.add_parser("time", help="time opening a dictionary (word list, compiled, or shards) and first guesses")
+    timing.add_argument("dictionary")
+    timing.add_argument("letters", help="seven letters, central letter first")
+    timing.add_argument("--max-mb", type=float, help="most megabytes of shards kept mapped")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        trie = Trie()
+        if not trie.getFromFile(args.wordfile):
+            raise SystemExit(f"could not read {args.wordfile}")
+        print(f"{compileShards(trie, args.directory)} words in {len(trie.root.children)} shards")
+        return
+
+    start = time.perf_counter()
+    sbt = SBTrie()
+    if args.max_mb is not None:
+        sbt.maxShardBytes = int(args.max_mb * 2**20)
+    if not sbt.getFromFile(args.dictionary):
+        raise SystemExit(f"could not read {args.dictionary}")
+    opened = time.perf_counter() - start
+
+    sbt.setLetters(args.letters[0], args.letters[1:])
+    answers = sbt.currentAnswers().answers
+    guess = answers[0] if answers else args.letters[0] * 4
+    points = sbt.isNewSBWord(guess)
+    firstGuess = time.perf_counter() - start
+    print(f"open: {opened * 1e3:.2f} ms, first guess ({guess}: {points} points): {firstGuess * 1e3:.2f} ms, "
+          f"{len(answers)} answers, {sbt.wordCount()} words")
+    if isSharded(args.dictionary):
+        stats = sbt.base.stats()
+        print(f"shards: {stats['loaded']}/{stats['shards']} mapped ({stats['loadedBytes'] / 2**20:.2f} MB), "
+              f"{stats['loads']} loads, {stats['evictions']} evictions")
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+Versioned, read-only dictionary snapshots for live updates. A
+DictionaryStore always holds one current snapshot (an SBTrie that is
+never changed once published). Updating builds a new snapshot whose base
+dictionary is the current one, so only the added words and the removed
+words are stored and everything else is shared with the previous
+version; reloading builds a complete new dictionary off to the side.
+Either way the new snapshot is swapped in with a single assignment, so
+lookups never see a half-loaded dictionary and never wait for a load.
+Games keep the snapshot they started with, and an old snapshot is freed
+once no game uses it. When updates stack too many snapshots on top of
+each other they are squashed into one layer over the bottom dictionary.
+"""
+
+import threading
+
+from sbtrie import SBTrie
+from trie import Trie, Node
+
+
+
+class DictionaryStore:
+    """ A class for the current dictionary snapshot and the updates that replace it """
+    def __init__(self, nodeType = Node, maxDepth: int = 8):
+        self.nodeType = nodeType # Class used for nodes of new snapshots
+        self.maxDepth = maxDepth # Most snapshots stacked by updates before they are squashed
+        self.current = SBTrie(nodeType) # Snapshot given to new games (never changed after being published)
+        self.generation = 0 # Incremented every time a new snapshot is published
+        self.lock = threading.Lock() # Only one update or reload builds a snapshot at a time
+
+
+
+    # Purpose: Retrieve current snapshot for a new game.
+    # Params: None.
+    # Returns: Current read-only SBTrie.
+    def snapshot(self) -> SBTrie:
+        return self.current
+
+
+
+    # Purpose: Publish a new snapshot with all words from a file added to current snapshot's words.
+    # Params: Name of file to retrieve words from (plain word list or compiled), optional function called with load statistics.
+    # Returns: True if new snapshot was published, false if file could not be read (current snapshot is kept).
+    def update(self, filename: str, progress = None) -> bool:
+        with self.lock:
+            dictionary = self._fork(self.current)
+            if not dictionary.getFromFile(filename, progress):
+                return False
+            self._publish(dictionary)
+        return True
+
+
+
+    # Purpose: Publish a new snapshot containing only words from a file.
+    # Params: Name of file to retrieve words from (plain word list or compiled), optional function called with load statistics.
+    # Returns: True if new snapshot was published, false if file could not be read (current snapshot is kept).
+    def reload(self, filename: str, progress = None) -> bool:
+        with self.lock:
+            dictionary = SBTrie(self.nodeType)
+            if not dictionary.getFromFile(filename, progress):
+                return False
+            self._publish(dictionary)
+        return True
+
+
+
+    # Purpose: Publish a new snapshot with words added and removed.
+    # Params: Iterable of words to add, iterable of words to remove.
+    # Returns: Tuple of number of words added and number removed.
+    def edit(self, added = (), removed = ()) -> tuple:
+        with self.lock:
+            dictionary = self._fork(self.current)
+            addCount = sum(1 for word in added if dictionary.insert(word))
+            removeCount = sum(dictionary.removeAll(removed).values())
+            self._publish(dictionary)
+        return addCount, removeCount
+
+
+
+    # Purpose: Helper function to swap in a new snapshot.
+    # Params: SBTrie to publish (must not be changed afterwards).
+    # Returns: None (replaces current snapshot).
+    def _publish(self, dictionary: SBTrie):
+        self.generation += 1
+        self.current = dictionary # Single assignment, so readers see either old or new snapshot
+
+
+
+    # Purpose: Helper function to start a new snapshot that shares all words of an existing one.
+    # Params: Snapshot to build on.
+    # Returns: Empty SBTrie whose base dictionary is snapshot (or squashed layers of it).
+    def _fork(self, snapshot: SBTrie) -> SBTrie:
+        if snapshot.count == 0:
+            return SBTrie(self.nodeType) # Nothing to share, so new snapshot can memory-map a compiled file directly
+        if depth(snapshot) >= self.maxDepth:
+            snapshot = self._squash(snapshot)
+
+        dictionary = SBTrie(self.nodeType)
+        dictionary.base = snapshot # Lookups fall through to previous snapshot, which is never changed
+        dictionary.count = snapshot.count
+        return dictionary
+
+
+
+    # Purpose: Helper function to merge stacked snapshots into one layer over the bottom dictionary.
+    # Params: Snapshot to squash.
+    # Returns: New SBTrie with same words as snapshot, holding only differences from bottom dictionary.
+    def _squash(self, snapshot: SBTrie) -> SBTrie:
+        layers = []
+        bottom = snapshot
+        while isinstance(bottom, SBTrie):
+            layers.append(bottom)
+            bottom = bottom.base
+
+        dictionary = SBTrie(self.nodeType)
+        if bottom is not None:
+            dictionary.base = bottom # Compiled dictionary at bottom is shared, not copied
+            dictionary.count = bottom.wordCount()
+
+        # Only words a layer added or removed can differ from bottom dictionary
+        for layer in layers:
+            for word in Trie.iterWords(layer): # Words stored in layer itself, not its base
+                if snapshot.search(word):
+                    dictionary.insert(word)
+            for word in layer.baseRemoved:
+                if not snapshot.search(word):
+                    dictionary.remove(word)
+        return dictionary
+
+
+
+# Purpose: Count snapshots stacked on top of each other.
+# Params: Snapshot.
+# Returns: Number of SBTrie layers down to bottom dictionary (1 for a snapshot without SBTrie base).
+def depth(snapshot: SBTrie) -> int:
+    layers = 0
+    while isinstance(snapshot, SBTrie):
+        layers += 1
+        snapshot = snapshot.base
+    return layers
@@ -1,260 +1,534 @@
-# -*- coding: utf-8 -*-
-"""
-New York Times Spelling Bee
-This project recreates New York Times' incredibly fun yet simple 
-Spelling Bee game. The player's job and rules are as follows:
-possible that are:
-- Four letters long or longer
-- Contains “central letter”
-- May contain six “other letters”
-- Allowed letters may be used more than once
-- Words must exist in current word dictionary
-- Player can make as many guesses as they wish when finding possible words 
-The goal is to rack up as many points as possible by finding as many words 
-as possible! The user can also achieve a pangram by finding a word that uses 
-all seven valid letters, and a bingo by finding at least one word for all of 
-the seven valid letters (so at seven words starting with each letter). Run 
-and follow the program's commands for more information.
-"""
-
-from sbtrie import SBTrie 
-
-# Purpose: Clear out existing word dictionary and create new dictionary using words from new file.
-# Params: Name of file to process words contained in it.
-# Returns: None (updates trie with all words from file).
-def getNewDictionary(sbt, filename):
-  sbt.clear()
-  sbt.getFromFile(filename)
-
-
-
-# Purpose: Add to existing word dictionary using words from new file.
-# Params: Name of file to process words contained in it.
-# Returns: None (updates trie with new words from file).
-def updateDictionary(sbt, filename):
-  sbt.getFromFile(filename)
-
-
-
-# Purpose: Process user-inputted string of letters to be used in game, check for validity, and initialize central and other letters.
-# Params: String of letters to be used in game.
-# Returns: None (initializes trie data members)
-def setupLetters(sbt, letters):
-  allLetters = []
-  for letter in letters:
-    if letter.isalpha() and letter.lower() not in allLetters: # Non-letters and repeats are ignored
-      allLetters.append(letter.lower()) # If user enters upper case letter convert to lower case and add it to list
-  
-  # If user enters seven unique letters, initialize trie's data members to start game
-  if len(allLetters) == 7:
-    sbt.centralLetter = allLetters[0]
-    sbt.otherLetters = "".join(allLetters[1:])
-    sbt.discoveredWords.clear()
-    sbt.pangramFound = False
-    sbt.bingoFound = False
-    sbt.score = 0
-  else:
-    print("Invalid letter set") # If user does not enter seven unique letters display error message
-
-
-
-# Purpose: Display current centeral letter and six other letters.
-# Params: None.
-# Returns: Print statements of central letter and six other letters.
-def showLetters(sbt):
-  print(f"Central Letter: {sbt.centralLetter}")
-  print(f"6 Other Letters: {','.join(sbt.otherLetters)}")
-
-
-
-# Purpose: Screens potential word from user to see if it's valid and updates points and prints corresponding messages if so.
-# Params: Word that user entered to be checked.
-# Returns: None (updates trie data members such as score, discoveredWords, pangramFound, and bingoFound depending on word).
-def attemptWord(sbt, word):
-  points = sbt.isNewSBWord(word) # Call to isNewSBWord() returns how many points earned
-
-  # All reasons word can be invalid, if so print error message and return without updating data members
-  if points == -1:
-    print("word is too short")
-    return
-  elif points == -2:
-    print("word is missing central letter")
-    return
-  elif points == -3:
-    print("word contains invalid letter")
-    return
-  elif points == -4:
-    print("word not in dictionary")
-    return
-  elif points == -5:
-    print("word has already been found")
-    return
-
-  # If word survives validity screening, insert into discoveredWords and increment score by points earned
-  sbt.discoveredWords.insert(word)
-  sbt.score += points
-
-  # Assigns singular or plural for word and total points message
-  if points == 1:
-    printPoint = "point"
-  else:
-    printPoint = "points"
-
-  if sbt.score == 1:
-    printTotal = "point"
-  else:
-    printTotal = "points"
-
-  message = f"found {word} {points} {printPoint}, total {sbt.score} {printTotal}"
-
-  # Concatenates message if word is pangram
-  if sbt.isPangram(word):
-    sbt.pangramFound = True
-    message += ", Pangram found"
-
-  # Concatenates message if user achieved bingo
-  if sbt.hasBingo() and sbt.discoveredWords.count == 7:
-    sbt.bingoFound = True
-    message += ", Bingo scored"
-
-  print(message)
-
-
-
-# Purpose: Displays all words found and at the end, total word count, points earned, and if pangram and bingos were achieved.
-# Params: None.
-# Returns: None (prints messages containing information in purpose).
-def showFoundWords(sbt):
-  foundWords = sbt.getFoundWords()
-  foundWords.sort()
-
-  # Call to words() on discoveredWords returns a list to sort and print in alphabetical order
-  for word in foundWords:
-    print(word)
-  
-  # Assigns singular or plural for word and total points message
-  if len(foundWords) == 1:
-    printWord = "word"
-  else:
-    printWord = "words"
-
-  if sbt.score == 1:
-    printPoint = "point"
-  else:
-    printPoint = "points"
-
-  message = f"{len(foundWords)} {printWord} found, total {sbt.score} {printPoint}"
-
-  # Concatenates message if pangram or bingo achieved
-  if sbt.pangramFound:
-    message += ", Pangram found"
-  if sbt.bingoFound:
-    message += ", Bingo scored"
-
-  print(message)
-
-
-
-# Purpose: Prints message containing all possible Spelling Bee words from dictionary, their length, if word is pangram, and if a bingo is found with seven valid letters.
-# Params: None.
-# Returns: None (prints message containing all possible Spelling Bee words from dictionary).
-def showAllWords(sbt):
-  allWords = sbt.sbWords(sbt.centralLetter, sbt.otherLetters) # call to sbWords() on trie collects all words that are valid from using a combination of valid letters.
-  allWords.sort()
-  foundLetters = []
-
-  for word in allWords:
-    if len(word) > 17:
-      line = f"{word} {len(word)}" # One space for words larger than seventeen letters
-    else:
-      line = f"{word}{' ' * (20 - len(word) - 1)}{len(word)}" # Align words for a right justified column of word lengths
-    
-    # Manually track for bingo (hasBingo function works only for discoveredWords trie)
-    if word[0] not in foundLetters:
-      foundLetters.append(word[0])
-
-    # Check if word is pangram and add to message
-    if sbt.isPangram(word):
-      line += " Pangram"
-    print(line)
-  
-  # Manual check for bingo (hasBingo function works only for discoveredWords trie)
-  foundBingo = True
-  for letter in sbt.getLetters():
-     if letter not in foundLetters:
-        foundBingo = False
-        break
-     
-  if foundBingo:
-     print("Bingo found")
-
-
-
-# Purpose: Display all Spelling Bee game commands to user.
-# Params: None.
-# Returns: None (prints display menu of commands).
-def displayCommands():
-  print( "\nCommands are given by digits 1 through 9\n")
-  print( "  1 <filename> - read in a new dictionary from a file")
-  print( "  2 <filename> - update the existing dictionary with words from a file")
-  print( "  3 <7letters> - enter a new central letter and 6 other letters")
-  print( "  4            - display current central letter and other letters")
-  print( "  5 <word>     - enter a potential word")
-  print( "  6            - display found words and other stats")
-  print( "  7            - list all possible Spelling Bee words from the dictionary")
-  print( "  8            - display this list of commands")
-  print( "  9            - quit the program")
-  print()
-
-
-
-# Purpose: Main function for Spelling Bee game.
-# Params: None, requests info from user (described in command menu).
-# Returns: None (interactive game with print messages in individual functions).
-def spellingBee():
-  print("Welcome to New York Times Spelling Bee Game!")
-  
-  sbt = SBTrie()
-
-  displayCommands()
-
-  while (True):
-    line = input ("cmd> ")
-    command = line[0]
-    args = ""
-
-    
-    if(command == '1'):
-        args = line[1:].strip()
-        getNewDictionary(sbt, args)
-
-    if(command == '2'):
-        args = line[1:].strip()
-        updateDictionary(sbt, args);
-        
-    if(command == '3'):
-        args = line[1:].strip()
-        setupLetters(sbt, args);
-
-    if(command == '4'):
-        showLetters(sbt);
-
-    if(command == '5'):
-        args = line[1:].strip()
-        attemptWord(sbt, args);
-
-    if(command == '6'):
-        showFoundWords(sbt);
-
-    if(command == '7'):
-        showAllWords(sbt)
-
-    if(command == '8' or command == '?'):
-        displayCommands();
-    
-    if(command == '9' or command == 'q'):
-        break
-    
-  return
-  
-spellingBee()
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""
+New York Times Spelling Bee
+This project recreates New York Times' incredibly fun yet simple 
+Spelling Bee game. The player's job and rules are as follows:
+possible that are:
+- Four letters long or longer
+- Contains “central letter”
+- May contain six “other letters”
+- Allowed letters may be used more than once
+- Words must exist in current word dictionary
+- Player can make as many guesses as they wish when finding possible words 
+The goal is to rack up as many points as possible by finding as many words 
+as possible! The user can also achieve a pangram by finding a word that uses 
+all seven valid letters, and a bingo by finding at least one word for all of 
+the seven valid letters (so at seven words starting with each letter). Run 
+and follow the program's commands for more information. Run with a
+journal file name (python spellingbee.py game.journal) to save the game
+as it is played and continue it after the program is restarted. Run with
+--batch FILE (or --batch - to read a pipe) to run commands without
+prompting, optionally with --json for one JSON result per command (and
+--suggest for "did you mean" suggestions, which are off in batch mode);
+the number of commands and time per command are reported on standard error.
+"""
+
+import argparse
+import json
+import sys
+import time
+from itertools import islice
+
+from instrument import disableInstrumentation, enableInstrumentation, report
+from journal import SessionJournal
+from sbtrie import SBTrie 
+
+# Messages for each invalid word result of isNewSBWord()
+WORD_ERRORS = {-1: "word is too short", -2: "word is missing central letter", -3: "word contains invalid letter",
+               -4: "word not in dictionary", -5: "word has already been found"}
+BATCH_LINES = 4096 # Output lines buffered in batch mode before they are written
+
+
+# Purpose: Clear out existing word dictionary and create new dictionary using words from new file.
+# Params: Name of file to process words contained in it.
+# Returns: None (updates trie with all words from file).
+def getNewDictionary(sbt, filename):
+  sbt.clear()
+  sbt.getFromFile(filename)
+
+
+
+# Purpose: Add to existing word dictionary using words from new file.
+# Params: Name of file to process words contained in it.
+# Returns: None (updates trie with new words from file).
+def updateDictionary(sbt, filename):
+  sbt.getFromFile(filename)
+
+
+
+# Purpose: Remove every word listed in a file (a blocklist) from existing word dictionary.
+# Params: Name of file with words to remove, function used to display messages (print by default).
+# Returns: None (updates trie and prints how many words were removed).
+def removeBlocklist(sbt, filename, out=print):
+  try:
+    with open(filename, "r") as blockFile:
+      words = blockFile.read().split()
+  except (OSError, UnicodeDecodeError):
+    out(f"could not read {filename}")
+    return
+  results = sbt.removeAll(words) # One pass over shared prefixes instead of one search per word
+  out(f"removed {sum(results.values())} of {len(results)} words")
+
+
+
+# Purpose: Process user-inputted string of letters to be used in game, check for validity, and initialize central and other letters.
+# Params: String of letters to be used in game, function used to display messages (print by default).
+# Returns: None (initializes trie data members)
+def setupLetters(sbt, letters, out=print):
+  allLetters = []
+  for letter in letters:
+    if letter.isalpha() and letter.lower() not in allLetters: # Non-letters and repeats are ignored
+      allLetters.append(letter.lower()) # If user enters upper case letter convert to lower case and add it to list
+  
+  # If user enters seven unique letters, initialize trie's data members to start game
+  if len(allLetters) == 7:
+    sbt.setLetters(allLetters[0], "".join(allLetters[1:])) # Also precomputes answers and points for new letters
+  else:
+    out("Invalid letter set") # If user does not enter seven unique letters display error message
+
+
+
+# Purpose: Display current centeral letter and six other letters.
+# Params: Function used to display messages (print by default).
+# Returns: Print statements of central letter and six other letters.
+def showLetters(sbt, out=print):
+  out(f"Central Letter: {sbt.centralLetter}")
+  out(f"6 Other Letters: {','.join(sbt.otherLetters)}")
+
+
+
+# Purpose: Screens potential word from user to see if it's valid and updates points if so.
+# Params: Word that user entered to be checked, if answers close to a word not in dictionary should be suggested.
+# Returns: Dictionary of word, points earned (0 if invalid), error message (None if valid), suggested answers,
+# if word is a pangram, if word scored a bingo, and total score.
+def guessWord(sbt, word, suggest=True):
+  points = sbt.isNewSBWord(word) # Call to isNewSBWord() returns how many points earned
+  result = {"word": word, "points": 0, "error": None, "suggestions": [], "pangram": False, "bingo": False, "score": sbt.score}
+
+  # All reasons word can be invalid, if so return error message without updating data members
+  if points < 0:
+    result["error"] = WORD_ERRORS[points]
+    if points == -4 and suggest:
+      result["suggestions"] = sbt.suggestWords(word) # Answers one or two edits away
+    return result
+
+  # If word survives validity screening, insert into discoveredWords and increment score by points earned
+  result["pangram"], result["bingo"] = sbt.recordWord(word, points)
+  result["points"] = points
+  result["score"] = sbt.score
+  return result
+
+
+
+# Purpose: Screens potential word from user to see if it's valid and updates points and prints corresponding messages if so.
+# Params: Word that user entered to be checked, function used to display messages (print by default),
+# if answers close to a word not in dictionary should be suggested.
+# Returns: None (updates trie data members such as score, discoveredWords, pangramFound, and bingoFound depending on word,
+# and prints rank after a found word).
+def attemptWord(sbt, word, out=print, suggest=True):
+  result = guessWord(sbt, word, suggest)
+  if result["error"] is not None:
+    out(result["error"])
+    if result["suggestions"]:
+      out(f"did you mean: {', '.join(result['suggestions'])}")
+    return
+  points = result["points"]
+
+  # Assigns singular or plural for word and total points message
+  if points == 1:
+    printPoint = "point"
+  else:
+    printPoint = "points"
+
+  if sbt.score == 1:
+    printTotal = "point"
+  else:
+    printTotal = "points"
+
+  message = f"found {word} {points} {printPoint}, total {sbt.score} {printTotal}"
+
+  # Concatenates message if word is pangram
+  if result["pangram"]:
+    message += ", Pangram found"
+
+  # Concatenates message if user achieved bingo
+  if result["bingo"]:
+    message += ", Bingo scored"
+
+  out(message)
+  showRank(sbt, out) # Progress after each found word
+
+
+
+# Purpose: Displays rank and progress toward maximum score.
+# Params: Function used to display messages (print by default).
+# Returns: None (prints rank name, percentage of maximum score, and maximum score).
+def showRank(sbt, out=print):
+  out(f"Rank: {sbt.rank()} ({sbt.progress()}% of {sbt.currentAnswers().maxScore} points)")
+
+
+
+# Purpose: Read optional count and number of words to skip for a paged word listing.
+# Params: String with up to two whole numbers (count of words to display, then number of words skipped before them).
+# Returns: Tuple of count (None for all words) and start, or None if arguments are invalid.
+def parsePage(args):
+  numbers = args.split()
+  if len(numbers) > 2 or not all(number.isdigit() for number in numbers):
+    return None
+  count = int(numbers[0]) if numbers else None
+  start = int(numbers[1]) if len(numbers) > 1 else 0
+  return count, start
+
+
+
+# Purpose: Displays words found (all of them, or one page) and at the end, total word count, points earned, and if pangram and bingos were achieved.
+# Params: Optional count of words to display and number of words to skip, function used to display messages (print by default).
+# Returns: None (prints messages containing information in purpose).
+def showFoundWords(sbt, args="", out=print):
+  page = parsePage(args)
+  if page is None:
+    out("Invalid page")
+    return
+  count, start = page
+
+  # Found words are streamed in alphabetical order, stopping after requested page
+  for word in islice(sbt.iterFoundWords(), start, None if count is None else start + count):
+    out(word)
+  foundCount = sbt.discoveredWords.wordCount()
+  
+  # Assigns singular or plural for word and total points message
+  if foundCount == 1:
+    printWord = "word"
+  else:
+    printWord = "words"
+
+  if sbt.score == 1:
+    printPoint = "point"
+  else:
+    printPoint = "points"
+
+  message = f"{foundCount} {printWord} found, total {sbt.score} {printPoint}"
+
+  # Concatenates message if pangram or bingo achieved
+  if sbt.pangramFound:
+    message += ", Pangram found"
+  if sbt.bingoFound:
+    message += ", Bingo scored"
+
+  out(message)
+  showRank(sbt, out)
+
+
+
+# Purpose: Prints message containing all possible Spelling Bee words from dictionary (all of them, or one page), their length, if word is pangram, and if a bingo is found with seven valid letters.
+# Params: Optional count of words to display and number of words to skip, function used to display messages (print by default).
+# Returns: None (prints message containing all possible Spelling Bee words from dictionary).
+def showAllWords(sbt, args="", out=print):
+  page = parsePage(args)
+  if page is None:
+    out("Invalid page")
+    return
+  count, start = page
+  puzzle = sbt.currentAnswers() # Precomputed sorted answers, pangrams, and first letter counts shared with other players
+
+  for word in islice(puzzle.answers, start, None if count is None else start + count):
+    if len(word) > 17:
+      line = f"{word} {len(word)}" # One space for words larger than seventeen letters
+    else:
+      line = f"{word}{' ' * (20 - len(word) - 1)}{len(word)}" # Align words for a right justified column of word lengths
+
+    # Check if word is pangram and add to message
+    if word in puzzle.pangrams:
+      line += " Pangram"
+    out(line)
+  
+  # Bingo possible if answers start with every one of the seven letters
+  foundBingo = True
+  for letter in sbt.getLetters():
+     if letter not in puzzle.firstLetterCounts:
+        foundBingo = False
+        break
+     
+  if foundBingo:
+     out("Bingo found")
+
+
+
+# Purpose: Display hint grid of how many answers start with each letter at each length, two letter list, and pangram counts.
+# Params: "all" to count every answer (otherwise only answers not found yet), function used to display messages (print by default).
+# Returns: None (prints hint grid, "-" where no answers are left).
+def showHints(sbt, args, out=print):
+  hints = sbt.hints(remaining=(args != "all"))
+  lengths = sorted({length for letter, length in hints.lengthCounts})
+  letters = sorted({letter for letter, length in hints.lengthCounts})
+  show = lambda count: str(count) if count else "-"
+
+  out(f"Pangrams: {hints.pangrams} ({hints.perfectPangrams} perfect)")
+  if not letters:
+    return # No answers for current letters
+
+  # Grid rows are first letters and columns are word lengths, with totals at end of each
+  out("   " + "".join(f"{length:>4}" for length in lengths) + "   Σ")
+  for letter in letters:
+    counts = [hints.lengthCounts.get((letter, length), 0) for length in lengths]
+    out(f"{letter.upper()}: " + "".join(f"{show(count):>4}" for count in counts) + f"{show(sum(counts)):>4}")
+  totals = [sum(hints.lengthCounts.get((letter, length), 0) for letter in letters) for length in lengths]
+  out("Σ: " + "".join(f"{show(count):>4}" for count in totals) + f"{show(sum(totals)):>4}")
+
+  # Two letter list, one line per first letter
+  for letter in letters:
+    prefixes = sorted(prefix for prefix in hints.prefixCounts if prefix[0] == letter)
+    out(" ".join(f"{prefix.upper()}-{show(hints.prefixCounts[prefix])}" for prefix in prefixes))
+
+
+
+# Purpose: Display dictionary statistics, or turn instrumentation of dictionary operations on or off.
+# Params: "on" or "off" to turn instrumentation on or off (anything else displays statistics), function used to display messages (print by default).
+# Returns: None (prints word and node counts, estimated memory, cache statistics, and instrumentation counters and timings).
+def showStats(sbt, args, out=print):
+  if args == "on":
+    enableInstrumentation(sbt)
+    out("instrumentation on")
+    return
+  elif args == "off":
+    disableInstrumentation(sbt)
+    out("instrumentation off")
+    return
+
+  stats = report(sbt)
+  out(f"{stats['words']} words, {stats['nodes']} nodes, about {stats['estimatedBytes'] / 2**20:.1f} MB")
+  cache = stats["puzzleCache"]
+  out(f"puzzle cache: {cache['size']}/{cache['maxSize']} puzzles, {cache['hits']} hits, {cache['misses']} misses")
+  if "shards" in stats:
+    shards = stats["shards"]
+    out(f"shards: {shards['loaded']}/{shards['shards']} mapped, {shards['loadedBytes'] / 2**20:.1f}/{shards['maxBytes'] / 2**20:.1f} MB, {shards['loads']} loads, {shards['evictions']} evictions")
+
+  if stats["instrumentation"] is None:
+    out("instrumentation off (turn on with: 0 on)")
+    return
+  out(", ".join(f"{name} {count}" for name, count in stats["instrumentation"]["counters"].items()))
+  for method, timing in stats["instrumentation"]["methods"].items():
+    out(f"{method}: {timing['calls']} calls, {timing['totalMs']:.2f} ms total, {timing['avgMs']:.4f} ms avg, {timing['maxMs']:.4f} ms max")
+
+
+
+# Purpose: Display all Spelling Bee game commands to user.
+# Params: Function used to display messages (print by default).
+# Returns: None (prints display menu of commands).
+def displayCommands(out=print):
+  out( "\nCommands are given by digits 0 through 9, b and h\n")
+  out( "  0 [on|off]   - display dictionary statistics, or turn instrumentation on or off")
+  out( "  1 <filename> - read in a new dictionary from a file")
+  out( "  2 <filename> - update the existing dictionary with words from a file")
+  out( "  b <filename> - remove words listed in a file (blocklist) from the dictionary")
+  out( "  3 <7letters> - enter a new central letter and 6 other letters")
+  out( "  4            - display current central letter and other letters")
+  out( "  5 <word>     - enter a potential word")
+  out( "  6 [n [skip]] - display found words (only n of them after skipping some) and other stats")
+  out( "  7 [n [skip]] - list all possible Spelling Bee words (only n of them after skipping some)")
+  out( "  h [all]      - display hint grid for words not found yet (or all words)")
+  out( "  8            - display this list of commands")
+  out( "  9            - quit the program")
+  out("")
+
+
+
+# Purpose: Run one command line of the game.
+# Params: Command line (command character followed by its arguments), function used to display messages (print by default),
+# if answers close to guesses not in dictionary should be suggested.
+# Returns: False if command quits the game, true otherwise (blank lines and unknown commands are ignored).
+def runCommand(sbt, line, out=print, suggest=True):
+  line = line.strip()
+  if not line:
+    return True
+  command = line[0]
+  args = line[1:].strip()
+
+  if(command == '1'):
+      getNewDictionary(sbt, args)
+
+  if(command == '2'):
+      updateDictionary(sbt, args)
+
+  if(command == 'b'):
+      removeBlocklist(sbt, args, out)
+
+  if(command == '3'):
+      setupLetters(sbt, args, out)
+
+  if(command == '4'):
+      showLetters(sbt, out)
+
+  if(command == '5'):
+      attemptWord(sbt, args, out, suggest)
+
+  if(command == '6'):
+      showFoundWords(sbt, args, out)
+
+  if(command == '7'):
+      showAllWords(sbt, args, out)
+
+  if(command == '8' or command == '?'):
+      displayCommands(out)
+
+  if(command == 'h'):
+      showHints(sbt, args, out)
+
+  if(command == '0'):
+      showStats(sbt, args, out)
+
+  return command != '9' and command != 'q'
+
+
+
+# Purpose: Run one command line of the game and capture its result for JSON output.
+# Params: Command line, if answers close to guesses not in dictionary should be suggested.
+# Returns: Dictionary of command, arguments, and result (fields of guessWord() for command 5, page of answers
+# for command 7, lines that would be printed for other commands).
+def commandResult(sbt, line, suggest=True):
+  line = line.strip()
+  command = line[:1]
+  args = line[1:].strip()
+  result = {"command": command, "args": args}
+
+  if command == '5':
+    result.update(guessWord(sbt, args, suggest))
+  elif command == '7' and parsePage(args) is not None:
+    count, start = parsePage(args)
+    puzzle = sbt.currentAnswers()
+    words = list(islice(puzzle.answers, start, None if count is None else start + count))
+    result["words"] = words
+    result["pangrams"] = [word for word in words if word in puzzle.pangrams]
+    result["bingo"] = all(letter in puzzle.firstLetterCounts for letter in sbt.getLetters())
+  else:
+    lines = []
+    result["quit"] = not runCommand(sbt, line, lines.append, suggest)
+    result["output"] = lines
+  return result
+
+
+
+# Purpose: Run commands from a file (or a pipe) without prompting, buffering output and timing every command.
+# Params: Open file of command lines, open file to write output to, if results should be written as one JSON object per line,
+# if answers close to guesses not in dictionary should be suggested (off by default, since a suggestion costs far more than a guess).
+# Returns: Dictionary of number of commands run, total seconds, and count and seconds per command character.
+def runBatch(sbt, commandFile, outFile, jsonOutput=False, suggest=False):
+  lines = []
+  timings = {} # Command character keys and [count, seconds] values
+  commandCount = 0
+  start = time.perf_counter()
+
+  for line in commandFile:
+    line = line.strip()
+    if not line:
+      continue # Blank lines are not commands
+    commandStart = time.perf_counter()
+    if jsonOutput:
+      result = commandResult(sbt, line, suggest)
+      lines.append(json.dumps(result, separators=(",", ":")))
+      running = not result.get("quit", False)
+    else:
+      running = runCommand(sbt, line, lines.append, suggest)
+    timing = timings.setdefault(line[0], [0, 0.0])
+    timing[0] += 1
+    timing[1] += time.perf_counter() - commandStart
+    commandCount += 1
+
+    # Output is written in large blocks instead of one line at a time
+    if len(lines) >= BATCH_LINES:
+      outFile.write("\n".join(lines) + "\n")
+      lines = []
+    if not running:
+      break
+
+  if lines:
+    outFile.write("\n".join(lines) + "\n")
+  outFile.flush()
+  return {"commands": commandCount, "seconds": time.perf_counter() - start,
+          "perCommand": {command: {"count": count, "seconds": seconds} for command, (count, seconds) in timings.items()}}
+
+
+
+# Purpose: Main function for Spelling Bee game.
+# Params: Optional journal file to save game in and restore it from, requests info from user (described in command menu).
+# Returns: None (interactive game with print messages in individual functions).
+def spellingBee(journalFile=None):
+  print("Welcome to New York Times Spelling Bee Game!")
+  
+  sbt = SBTrie()
+
+  journal = None
+  if journalFile:
+    journal = SessionJournal(journalFile, syncEvery=1) # One player, so every word can be synced right away
+    state = journal.recover().get("player")
+    journal.attach("player", sbt, state)
+    if state is not None and sbt.centralLetter:
+      print(f"Resumed game with letters {sbt.getLetters()}: {sbt.discoveredWords.count} words found, total {sbt.score} points (load a dictionary to continue)")
+
+  displayCommands()
+
+  while (True):
+    try:
+      line = input ("cmd> ")
+    except EOFError:
+      break # End of input quits like command 9
+    if not runCommand(sbt, line):
+      break
+    
+  if journal is not None:
+    journal.close()
+  return
+
+
+
+# Purpose: Run game in batch mode, reading commands from a file or standard input.
+# Params: Name of command file ("-" for standard input), optional journal file, if results should be JSON,
+# if answers close to guesses not in dictionary should be suggested.
+# Returns: None (writes command output to standard output and timings to standard error).
+def spellingBeeBatch(commandFilename, journalFile=None, jsonOutput=False, suggest=False):
+  sbt = SBTrie()
+  journal = None
+  if journalFile:
+    journal = SessionJournal(journalFile) # Synced in batches of records, and on close
+    journal.attach("player", sbt, journal.recover().get("player"))
+
+  if commandFilename == "-":
+    stats = runBatch(sbt, sys.stdin, sys.stdout, jsonOutput, suggest)
+  else:
+    try:
+      commandFile = open(commandFilename, "r")
+    except OSError:
+      raise SystemExit(f"could not read {commandFilename}")
+    with commandFile:
+      stats = runBatch(sbt, commandFile, sys.stdout, jsonOutput, suggest)
+  if journal is not None:
+    journal.close()
+
+  commands = stats["commands"]
+  rate = commands / stats["seconds"] if stats["seconds"] else 0
+  print(f"{commands} commands in {stats['seconds']:.3f} s ({rate:.0f} per second)", file=sys.stderr)
+  for command, timing in sorted(stats["perCommand"].items()):
+    print(f"  {command}: {timing['count']} commands, {timing['seconds'] / timing['count'] * 1e6:.1f} us each", file=sys.stderr)
+
+
+
+# Purpose: Parse command line and start interactive or batch game.
+# Params: None, reads command line arguments.
+# Returns: None.
+def main():
+  parser = argparse.ArgumentParser(description="New York Times Spelling Bee")
+  parser.add_argument("journal", nargs="?", help="journal file to save game in and resume it from")
+  parser.add_argument("--batch", metavar="FILE", help="run commands from a file (- for standard input) without prompting")
+  parser.add_argument("--json", action="store_true", help="write one JSON result per command (with --batch)")
+  parser.add_argument("--suggest", action="store_true", help="suggest answers for guesses not in dictionary (with --batch)")
+  args = parser.parse_args()
+
+  if args.batch:
+    spellingBeeBatch(args.batch, args.journal, args.json, args.suggest)
+  else:
+    spellingBee(args.journal)
+
+
+
+if __name__ == "__main__":
+  main()
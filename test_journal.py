@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Tests for crash recovery of the session journal: a journal cut off in the
+middle of a record, and a crash during compaction after the snapshot was
+written but before the journal was truncated.
+Run as: python -m pytest -q test_journal.py
+"""
+
+import os
+
+import pytest
+
+from journal import SessionJournal
+from sbtrie import SBSession, SBTrie
+
+WORDS = ["cane", "lance", "central", "rant", "antler", "neat", "tern"] # "tern" has no central letter
+
+
+
+# Purpose: Fixture for a small dictionary with one pangram for letters a + celnrt.
+# Params: None.
+# Returns: SBTrie holding WORDS.
+@pytest.fixture
+def dictionary() -> SBTrie:
+    trie = SBTrie()
+    for word in WORDS:
+        trie.insert(word)
+    return trie
+
+
+
+# Purpose: Start a journaled session on letters a + celnrt.
+# Params: Journal (already recovered), session id, dictionary.
+# Returns: Attached SBSession with its letters set.
+def startSession(journal: SessionJournal, sessionId: str, dictionary: SBTrie) -> SBSession:
+    session = SBSession(dictionary)
+    journal.attach(sessionId, session)
+    session.setLetters("a", "celnrt")
+    return session
+
+
+
+# Purpose: Play words in a session the way the game does, checking each before recording it.
+# Params: SBSession, list of words.
+# Returns: None (records every word that is a new answer).
+def play(session: SBSession, words: list[str]):
+    for word in words:
+        points = session.isNewSBWord(word)
+        if points > 0:
+            session.recordWord(word, points)
+
+
+
+# Purpose: Check a recovered state against a live session.
+# Params: State dictionary from recover(), SBSession.
+# Returns: None (fails test if they differ).
+def assertSameState(state: dict, session: SBSession):
+    assert state["centralLetter"] == session.centralLetter
+    assert state["otherLetters"] == session.otherLetters
+    assert sorted(state["words"]) == session.getFoundWords()
+    assert state["score"] == session.score
+    assert state["pangramFound"] == session.pangramFound
+    assert state["bingoFound"] == session.bingoFound
+
+
+
+# Purpose: Recover a journal whose last record was cut off by a crash.
+# Params: pytest temporary directory, dictionary fixture.
+# Returns: None (fails test if state is wrong or partial record is left in file).
+def test_recover_cuts_partly_written_record(tmp_path, dictionary):
+    filename = str(tmp_path / "sessions.journal")
+    journal = SessionJournal(filename, syncEvery=1)
+    journal.recover()
+    first = startSession(journal, "one", dictionary)
+    second = startSession(journal, "two", dictionary)
+    play(first, ["cane", "central"])
+    play(second, ["rant"])
+    journal.close()
+    complete = os.path.getsize(filename)
+
+    # Crash while writing next record leaves it without its line break
+    with open(filename, "a", encoding="utf-8") as journalFile:
+        journalFile.write(f"{journal.sequence + 1}\tone\tW\tlan")
+    assert os.path.getsize(filename) > complete
+
+    journal = SessionJournal(filename, syncEvery=1)
+    states = journal.recover()
+    assert os.path.getsize(filename) == complete
+    assert sorted(states) == ["one", "two"]
+    assertSameState(states["one"], first)
+    assertSameState(states["two"], second)
+    assert states["one"]["pangramFound"]
+    assert states["one"]["score"] == 1 + 14 # Four letter word, then seven letter pangram (7 + 7)
+
+    # Records written after recovery start on a line of their own and are recovered too
+    restored = SBSession(dictionary)
+    journal.attach("one", restored, states["one"])
+    play(restored, ["lance"])
+    journal.close()
+    journal = SessionJournal(filename)
+    states = journal.recover()
+    journal.close()
+    assertSameState(states["one"], restored)
+    assert sorted(states["one"]["words"]) == ["cane", "central", "lance"]
+
+
+
+# Purpose: Recover after compaction wrote its snapshot but crashed before truncating journal.
+# Params: pytest temporary directory, dictionary fixture.
+# Returns: None (fails test if records already in snapshot are lost or applied twice).
+def test_recover_after_crash_between_snapshot_and_truncate(tmp_path, dictionary):
+    filename = str(tmp_path / "sessions.journal")
+    journal = SessionJournal(filename, syncEvery=1)
+    journal.recover()
+    first = startSession(journal, "one", dictionary)
+    second = startSession(journal, "two", dictionary)
+    play(first, ["cane"])
+    play(second, ["central"])
+    journal.compact() # Sessions start in snapshot, so journal left below holds only words found since
+
+    play(first, ["antler"])
+    play(second, ["lance"])
+    journal.detach("two") # Detached session is kept in snapshot from saved state
+    journal.sync()
+    with open(filename, "rb") as journalFile:
+        records = journalFile.read()
+
+    # Snapshot is written, then crash comes before journal is truncated, so old records are still there
+    journal.compact()
+    journal.close()
+    assert os.path.exists(journal.snapshotFile)
+    with open(filename, "wb") as journalFile:
+        journalFile.write(records)
+
+    journal = SessionJournal(filename, syncEvery=1)
+    states = journal.recover()
+    assert sorted(states) == ["one", "two"]
+    assertSameState(states["one"], first) # Records already in snapshot are not applied twice
+    assertSameState(states["two"], second)
+    assert len(states["one"]["words"]) == 2
+    assert states["two"]["score"] == 14 + 5
+
+    # New records continue after snapshot's sequence number, so next recovery applies them once
+    restored = SBSession(dictionary)
+    journal.attach("one", restored, states["one"])
+    play(restored, ["rant", "neat"])
+    journal.close()
+    journal = SessionJournal(filename)
+    states = journal.recover()
+    journal.close()
+    assertSameState(states["one"], restored)
+    assertSameState(states["two"], second)
+    assert sorted(states["one"]["words"]) == ["antler", "cane", "neat", "rant"]
@@ -1,164 +1,351 @@
-# -*- coding: utf-8 -*-
-"""
-This class uses dictionaries to implement a trie data structure, where
-words are stored in lowercase and includes typical operations for
-insertion, deletion, searching, loading words from a file, and more.
-The node's data members include the character stored in it, if the node
-is a valid (end) of a word, and a dictionary containing character keys and 
-node values of the next possible letters after the current node's character.
-"""
-
-class Node:
-    def __init__(self, ch: str = "", isWord: bool = False):
-        self.ch = ch # Character for the node
-        self.isWord = isWord # True if node is end of string
-        self.children = {} # Dictionary of character keys and node values
-
-class Trie:
-    """ A class for the Trie """
-    def __init__ (self):
-        self.root = Node() # Initialize root node
-        self.count = 0 # Number of words in trie
-    
-
-
-    # Purpose: Retrieve all words from a file and insert them into the trie.
-    # Params: Name of file to retrieve from.
-    # Returns: True if operation is successful, false if not.
-    def getFromFile(self, filename: str) -> bool:
-        try:
-            with open(filename, "r") as wordFile:
-                allWords = wordFile.read().split() # Read all words from file and place into list
-        except:
-            return False # Opening file unsuccessful
-        
-        # Words must only contain letters and are lowercased to be inserted into trie
-        for word in allWords:
-            word = word.lower()
-            if word.isalpha():
-                self.insert(word)
-        
-        return True
-    
-
-
-    # Purpose: Insert new word into trie.
-    # Params: String for word being added.
-    # Returns: True if word successfully inserted, false if not.
-    def insert(self, word: str) -> bool:
-        curr = self.root
-
-        for ch in word:
-            ch = ch.lower()
-            if not ch.isalpha():
-                return False # Character must not contain non-letters
-            
-            # If no path exists for current character, create a new node for it
-            if ch not in curr.children:
-                curr.children[ch] = Node(ch)
-            curr = curr.children[ch] # Traverse to next letter in sequence
-
-        if curr.isWord:
-            return False # Fails if word already exists
-        
-        curr.isWord = True # Mark last node as valid end of word
-        self.count += 1 # Increment word count
-        return True
-
-
-
-    # Purpose: Search for word from parameter.
-    # Params: String for word being searched.
-    # Returns: True if word from parameter exists in trie.
-    def search(self, word: str) -> bool:
-        curr = self.root
-        
-        for ch in word:
-            ch = ch.lower()
-            if ch in curr.children:
-                curr = curr.children[ch] # If path exists for current character, traverse to next node
-            else:
-                return False # Character not found in trie
-        
-        if curr.isWord:
-            return True # Return true if final node is valid end of word
-        return False
-    
-
-
-    # Purpose: Remove existing word from trie.
-    # Params: String for word being removed.
-    # Returns: True if word successfully removed, false if not.
-    def remove(self, word: str) -> bool:
-        if not self.search(word):
-            return False # If word not found return false
-        
-        self._remove(self.root, word, 0) # Recursively remove word starting from root
-    
-        self.count -= 1 # Decrement word count
-        return True
-
-
-
-    # Purpose: Recursive helper function for remove() to delete nodes of removed word.
-    # Params: Current node, word being removed, index of current character.
-    # Returns: True if current node should be deleted, false if not.
-    def _remove(self, curr, word: str, ind: int) -> bool:
-        if ind == len(word):
-            curr.isWord = False # Word being removed no longer valid
-            if len(curr.children) == 0:
-                return True # Last node should be removed if no children
-            return False # If node has children not safe to delete
-        
-        ch = word[ind].lower()
-        if ch not in curr.children:
-            return False # Path invalid if character does not exist
-        
-        shouldRemove = self._remove(curr.children[ch], word, ind + 1) # Recursive call for next node in sequence
-        if shouldRemove:
-            del curr.children[ch] # Delete child node from current node's dictionary of children if safe to delete
-        
-        if len(curr.children) == 0 and not curr.isWord:
-            return True # If current node has no children and is not a word then safe to delete
-        return False # Otherwise keep it
-
-
-
-    # Purpose: Remove all words from trie.
-    # Params: None.
-    # Returns: True after clearing trie.
-    def clear(self) -> bool:
-        self.root = Node() # Reset root node to empty
-        self.count = 0 # Reset word count
-        return True
-    
-
-
-    # Purpose: Return number of words currently stored in trie.
-    # Params: None.
-    # Returns: Number of words currently stored in trie.
-    def wordCount(self) -> int:
-        return self.count
-    
-
-
-    # Purpose: Builds and returns a vector of strings containing all words in trie.
-    # Params: None.
-    # Returns: Vector of strings containing all words in trie.
-    def words(self) -> list[str]:
-        allWords = []
-        self._words(self.root, "", allWords) # Recursively retrieve words starting from root
-        return sorted(allWords)
-
-
-
-    # Purpose: Recursive helper function for words() to retrieve and store words from trie.
-    # Params: Current node, string of word so far after recursive call, and list to store full words.
-    # Returns: None (adds word to word list).
-    def _words(self, curr, wordSoFar, wordList):
-        if curr.isWord:
-            wordList.append(wordSoFar) # Adds word to list if current node is valid end of word
-
-        for ch in curr.children:
-            child = curr.children[ch] # Traverse all child nodes
-            self._words(child, wordSoFar + ch, wordList) # Add letter to word and call recursive function
\ No newline at end of file
+# -*- coding: utf-8 -*-
+"""
+This class uses dictionaries to implement a trie data structure, where
+words are stored in lowercase and includes typical operations for
+insertion, deletion, searching, loading words from a file, and more.
+The node's data members include the character stored in it, if the node
+is a valid (end) of a word, and a dictionary containing character keys and 
+node values of the next possible letters after the current node's character.
+A compact node type (CompactNode) can be passed to the trie instead, which
+uses __slots__, drops the stored character (it is already the key in the
+parent's dictionary), and shares one read-only empty dictionary between all
+leaf nodes until they get a child, to cut memory for large dictionaries.
+"""
+
+from types import MappingProxyType
+
+EMPTY_CHILDREN = MappingProxyType({}) # Read-only empty children shared by compact leaf nodes
+
+class Node:
+    def __init__(self, ch: str = "", isWord: bool = False):
+        self.ch = ch # Character for the node
+        self.isWord = isWord # True if node is end of string
+        self.children = {} # Dictionary of character keys and node values
+
+class CompactNode:
+    __slots__ = ("isWord", "children") # No per-node attribute dictionary
+
+    def __init__(self, ch: str = "", isWord: bool = False):
+        self.isWord = isWord # True if node is end of string (character is the key in parent's children)
+        self.children = EMPTY_CHILDREN # Replaced by a dictionary of character keys and node values on first child
+
+    # Shared read-only empty children can't be pickled, so leaves are pickled with None instead
+    def __getstate__(self):
+        return self.isWord, None if self.children is EMPTY_CHILDREN else self.children
+
+    def __setstate__(self, state):
+        self.isWord, children = state
+        self.children = EMPTY_CHILDREN if children is None else children
+
+# Purpose: Read words from an open text file in chunks, so the whole file is never in memory.
+# Params: Open text file (or any object with read()), dictionary of load statistics (characters read are
+# added to it), number of characters to read per chunk.
+# Returns: Generator of lists of words as they appear in file, one list per chunk (a word cut off at the
+# end of a chunk is held back and joined with the start of the next one).
+def readChunks(wordFile, stats: dict, chunkSize: int = 1 << 20):
+    leftover = "" # Partial word at end of previous chunk
+
+    while True:
+        chunk = wordFile.read(chunkSize)
+        if not chunk:
+            break
+        stats["characters"] += len(chunk)
+
+        tokens = (leftover + chunk).split()
+        leftover = "" if chunk[-1].isspace() else tokens.pop() # Last word may continue in next chunk
+        yield tokens
+
+    if leftover:
+        yield [leftover]
+
+
+
+class Trie:
+    """ A class for the Trie """
+    def __init__ (self, nodeType = Node):
+        self.nodeType = nodeType # Class used for nodes (Node or CompactNode)
+        self.root = nodeType() # Initialize root node
+        self.count = 0 # Number of words in trie
+        self.loadStats = None # Statistics from most recent file load (see getFromStream)
+        self.version = 0 # Incremented on every change to words in trie
+        self.instrumentation = None # Statistics collected while instrumentation is on (see instrument.py)
+    
+
+
+    # Purpose: Retrieve all words from a file and insert them into the trie.
+    # Params: Name of file to retrieve from, optional function called with load statistics after each chunk.
+    # Returns: True if operation is successful, false if not (words read before a failure stay inserted).
+    def getFromFile(self, filename: str, progress = None) -> bool:
+        try:
+            with open(filename, "r") as wordFile:
+                self.getFromStream(wordFile, progress)
+        except (OSError, UnicodeDecodeError):
+            return False # Opening or reading file unsuccessful
+
+        return True
+
+
+
+    # Purpose: Insert all words from an open text file, reading it in chunks so the whole file is never in memory.
+    # Params: Open text file (or any object with read()), optional function called with load statistics
+    # after each chunk, number of characters to read per chunk.
+    # Returns: Dictionary of load statistics (also kept in loadStats): characters read, words accepted,
+    # words rejected for containing non-letters, and duplicate words.
+    def getFromStream(self, wordFile, progress = None, chunkSize: int = 1 << 20) -> dict:
+        self.loadStats = {"characters": 0, "accepted": 0, "rejected": 0, "duplicates": 0}
+        for tokens in readChunks(wordFile, self.loadStats, chunkSize):
+            self._insertTokens(tokens)
+            if progress is not None:
+                progress(self.loadStats)
+        return self.loadStats
+
+
+
+    # Purpose: Helper function for getFromStream() to normalize and insert words, updating load statistics.
+    # Params: List of words read from file.
+    # Returns: None (inserts words and updates loadStats).
+    def _insertTokens(self, tokens: list[str]):
+        stats = self.loadStats
+
+        # Words must only contain letters and are lowercased to be inserted into trie
+        for word in tokens:
+            word = word.lower()
+            if not word.isalpha():
+                stats["rejected"] += 1
+            elif self.insert(word):
+                stats["accepted"] += 1
+            else:
+                stats["duplicates"] += 1
+    
+
+
+    # Purpose: Insert new word into trie.
+    # Params: String for word being added.
+    # Returns: True if word successfully inserted, false if not.
+    def insert(self, word: str) -> bool:
+        curr = self.root
+
+        for ch in word:
+            ch = ch.lower()
+            if not ch.isalpha():
+                return False # Character must not contain non-letters
+            
+            # If no path exists for current character, create a new node for it
+            if ch not in curr.children:
+                if curr.children is EMPTY_CHILDREN:
+                    curr.children = {} # Compact leaf gets its own dictionary in place of shared read-only one
+                curr.children[ch] = self.nodeType(ch)
+            curr = curr.children[ch] # Traverse to next letter in sequence
+
+        if curr.isWord:
+            return False # Fails if word already exists
+
+        curr.isWord = True # Mark last node as valid end of word
+        self.count += 1 # Increment word count
+        self.version += 1
+        return True
+
+
+
+    # Purpose: Search for word from parameter.
+    # Params: String for word being searched.
+    # Returns: True if word from parameter exists in trie.
+    def search(self, word: str) -> bool:
+        curr = self.root
+
+        for ch in word:
+            ch = ch.lower()
+            if ch in curr.children:
+                curr = curr.children[ch] # If path exists for current character, traverse to next node
+            else:
+                return False # Character not found in trie
+
+        if curr.isWord:
+            return True # Return true if final node is valid end of word
+        return False
+    
+
+
+    # Purpose: Remove existing word from trie.
+    # Params: String for word being removed.
+    # Returns: True if word successfully removed, false if not.
+    def remove(self, word: str) -> bool:
+        if not self.search(word):
+            return False # If word not found return false
+
+        self._remove(self.root, word, 0) # Recursively remove word starting from root
+    
+        self.count -= 1 # Decrement word count
+        self.version += 1
+        return True
+
+
+
+    # Purpose: Recursive helper function for remove() to delete nodes of removed word.
+    # Params: Current node, word being removed, index of current character.
+    # Returns: True if current node should be deleted, false if not.
+    def _remove(self, curr, word: str, ind: int) -> bool:
+        if ind == len(word):
+            curr.isWord = False # Word being removed no longer valid
+            if len(curr.children) == 0:
+                return True # Last node should be removed if no children
+            return False # If node has children not safe to delete
+
+        ch = word[ind].lower()
+        if ch not in curr.children:
+            return False # Path invalid if character does not exist
+
+        shouldRemove = self._remove(curr.children[ch], word, ind + 1) # Recursive call for next node in sequence
+        if shouldRemove:
+            del curr.children[ch] # Delete child node from current node's dictionary of children if safe to delete
+
+        if len(curr.children) == 0 and not curr.isWord:
+            return True # If current node has no children and is not a word then safe to delete
+        return False # Otherwise keep it
+
+
+
+    # Purpose: Remove many words at once. Words are sorted so each shared prefix is walked once, and
+    # branches left empty are pruned as walk backs out of them.
+    # Params: Iterable of words being removed (in any order, duplicates allowed).
+    # Returns: Dictionary of lowercased word keys (in order given) and values of true if word was removed, false if not found.
+    def removeAll(self, words) -> dict:
+        results = dict.fromkeys(word.lower() for word in words)
+        path = [self.root] # Nodes from root to end of walked part of previous word
+        letters = [] # Letter leading to each node in path after root
+        for word in sorted(results):
+            # Keep part of path shared with previous word
+            keep = 1
+            for ch, walked in zip(word, letters):
+                if ch != walked:
+                    break
+                keep += 1
+            self._backOut(path, letters, keep)
+
+            curr = path[-1]
+            for ch in word[keep - 1:]:
+                curr = curr.children.get(ch)
+                if curr is None:
+                    break # Path invalid if character does not exist
+                path.append(curr)
+                letters.append(ch)
+
+            results[word] = curr is not None and curr.isWord
+            if results[word]:
+                curr.isWord = False # Word being removed no longer valid
+                self.count -= 1
+                self.version += 1
+        self._backOut(path, letters, 1)
+        return results
+
+
+
+    # Purpose: Helper function for removeAll() to shorten walked path, deleting nodes with no words left below them.
+    # Params: List of nodes from root, list of letters leading to them, number of nodes to keep.
+    # Returns: None (shortens path and letters, deletes empty nodes from their parents).
+    def _backOut(self, path: list, letters: list, keep: int):
+        while len(path) > keep:
+            curr = path.pop()
+            ch = letters.pop()
+            if not curr.isWord and not curr.children:
+                del path[-1].children[ch] # Parent has this child, so its children are never shared empty ones
+
+
+
+    # Purpose: Remove all words from trie.
+    # Params: None.
+    # Returns: True after clearing trie.
+    def clear(self) -> bool:
+        self.root = self.nodeType() # Reset root node to empty
+        self.count = 0 # Reset word count
+        self.version += 1 # Version keeps counting up so old versions are never reused
+        return True
+    
+
+
+    # Purpose: Return number of words currently stored in trie.
+    # Params: None.
+    # Returns: Number of words currently stored in trie.
+    def wordCount(self) -> int:
+        return self.count
+    
+
+
+    # Purpose: Builds and returns a vector of strings containing all words in trie.
+    # Params: None.
+    # Returns: Vector of strings containing all words in trie, in sorted order.
+    def words(self) -> list[str]:
+        # Iterative walk with a stack of (node, word so far) pairs, sorted once at the end, since sorting
+        # children at every node and resuming a generator per word are much slower (see iterWords())
+        allWords = []
+        stack = [(self.root, "")]
+        while stack:
+            curr, wordSoFar = stack.pop()
+            if curr.isWord:
+                allWords.append(wordSoFar)
+            for ch, child in curr.children.items():
+                stack.append((child, wordSoFar + ch))
+        allWords.sort()
+        return allWords
+
+
+
+    # Purpose: Lazily yield words in trie in sorted order, so callers can stop early.
+    # Params: Optional prefix, only words starting with it are yielded.
+    # Returns: Generator of words (lowercase) in sorted order.
+    def iterWords(self, prefix: str = ""):
+        prefix = prefix.lower()
+        curr = self.root
+        for ch in prefix:
+            curr = curr.children.get(ch)
+            if curr is None:
+                return # No words start with prefix
+
+        if curr.isWord:
+            yield prefix
+
+        # Iterative depth-first search with a stack of child iterators instead of recursion,
+        # and one shared list of letters joined only when a word is found
+        path = list(prefix)
+        stack = [iter(sorted(curr.children.items()))]
+        while stack:
+            for ch, child in stack[-1]:
+                path.append(ch)
+                if child.isWord:
+                    yield "".join(path)
+                stack.append(iter(sorted(child.children.items()))) # Descend into child next
+                break
+            else:
+                stack.pop() # All children of this node visited
+                if stack:
+                    path.pop()
+
+
+
+    # Purpose: Find words within a small edit distance of a word, walking trie with one row of the
+    # Levenshtein table per node and skipping subtrees that can't get close enough.
+    # Params: Word to compare against, largest number of insertions, deletions, and substitutions allowed.
+    # Returns: List of (word, distance) tuples, closest first and then in alphabetical order.
+    def similarWords(self, word: str, maxDistance: int = 2) -> list[tuple]:
+        word = word.lower()
+        found = []
+        firstRow = list(range(len(word) + 1)) # Distances from empty prefix to each prefix of word
+        if self.root.isWord and firstRow[-1] <= maxDistance:
+            found.append(("", firstRow[-1]))
+
+        stack = [(self.root, "", firstRow)]
+        while stack:
+            curr, prefix, prevRow = stack.pop()
+            for ch, child in curr.children.items():
+                # Row for prefix + ch, each cell from deletion, insertion, or substitution (free if letters match)
+                row = [prevRow[0] + 1]
+                for col in range(1, len(word) + 1):
+                    row.append(min(row[col - 1] + 1, prevRow[col] + 1, prevRow[col - 1] + (word[col - 1] != ch)))
+
+                if child.isWord and row[-1] <= maxDistance:
+                    found.append((prefix + ch, row[-1]))
+                if min(row) <= maxDistance:
+                    stack.append((child, prefix + ch, row)) # Longer words through child can still be close enough
+
+        found.sort(key=lambda item: (item[1], item[0]))
+        return found